@@ -0,0 +1,359 @@
+# clinical_benchmark.py
+
+"""
+Benchmark harness for the Clinical Data curation and validation scripts.
+
+Generates synthetic NeuroBANK exports ('v_NB_IATI_*.csv') with the real column sets
+from the schema registry, runs clinical_Data_Curation.run_curation and then
+clinical_Package_Validation.run_validation on them, and writes a JSON report with the
+wall time and peak memory of every stage. Two reports can be compared to catch regressions.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for script_dir in ('common', 'data-curation', 'validation'):
+    sys.path.insert(0, os.path.join(REPO_DIR, script_dir))
+import clinical_Run_Report
+import clinical_Schema
+import clinical_Data_Curation
+import clinical_Package_Validation
+
+# Functions called by each script's entry point that are timed as a stage, in call order
+CURATION_STAGES = [
+    'define_filenames', 'define_headers', 'load_manifest', 'plan_incremental_curation',
+    'rename_and_move_files', 'curate_files_single_pass', 'print_curation_summary', 'save_manifest',
+    'add_participant_id', 'reorder_columns', 'clean_nan_values', 'update_participant_ids',
+]
+VALIDATION_STAGES = ['define_curated_filenames', 'load_subjects', 'validate_file']
+
+# Share of generated values exported as '.' or left blank
+SENTINEL_FRACTION = 0.05
+BLANK_FRACTION = 0.1
+
+# Report format version, bumped when fields change meaning
+REPORT_VERSION = 1
+
+def generate_column(column, row_count, rng):
+    """Return row_count synthetic values for a column, shaped like its registry kind."""
+    kind = clinical_Schema.column_kind(column)
+    if kind == 'date':
+        days = rng.integers(0, 365 * 10, row_count)
+        values = (np.datetime64('2012-01-01') + days).astype(str)
+    elif kind == 'int':
+        values = rng.integers(1900, 2020, row_count).astype(str)
+    elif kind == 'float':
+        values = np.char.mod('%.1f', rng.normal(50, 15, row_count).round(1))
+    elif kind == 'string':
+        words = np.array(['riluzole', 'edaravone', 'baclofen', 'other', 'see notes', 'n/a'])
+        values = words[rng.integers(0, len(words), row_count)]
+    else:
+        values = rng.integers(0, 5, row_count).astype(str)
+    values = values.astype(object)
+    draw = rng.random(row_count)
+    values[draw < SENTINEL_FRACTION] = '.'
+    values[(draw >= SENTINEL_FRACTION) & (draw < SENTINEL_FRACTION + BLANK_FRACTION)] = ''
+    return values
+
+def generate_neurobank_files(output_dir, subjects=1000, visits=4, rows=None, control_fraction=0.2, seed=0):
+    """
+    Write one synthetic 'v_NB_IATI_*.csv' export per table into output_dir.
+
+    'subjects.csv' has one row per subject, control_fraction of them with
+    'subject_group_id' 5. Every other table has visits rows per subject, or rows rows
+    spread over the subjects when rows is given.
+
+    Returns the number of rows and bytes written.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    uids = np.array([f"NEU{i:07d}" for i in range(subjects)], dtype=object)
+    is_control = rng.random(subjects) < control_fraction
+    group_ids = np.where(is_control, 5, rng.integers(1, 5, subjects))
+
+    initial_filenames, curated_filenames = clinical_Schema.define_filenames()
+    total_rows = 0
+    total_bytes = 0
+    for initial_name, curated_name, headers in zip(initial_filenames, curated_filenames, clinical_Schema.define_headers()):
+        # Raw exports do not have the 'Participant_ID' column yet
+        columns = [col for col in headers if col != 'Participant_ID']
+        if curated_name == 'subjects.csv':
+            df = pd.DataFrame({'SubjectUID': uids, 'subject_group_id': group_ids})
+        else:
+            row_count = rows if rows is not None else subjects * visits
+            subject_index = np.arange(row_count) % subjects
+            visit_number = np.arange(row_count) // subjects + 1
+            data = {}
+            for col in columns:
+                if col == 'SubjectUID':
+                    data[col] = uids[subject_index]
+                elif col in ('Form_Name', 'Child_Name'):
+                    data[col] = np.full(row_count, os.path.splitext(curated_name)[0], dtype=object)
+                elif col == 'Visit_Name':
+                    data[col] = np.char.add('Visit ', visit_number.astype(str)).astype(object)
+                else:
+                    data[col] = generate_column(col, row_count, rng)
+            df = pd.DataFrame(data, columns=columns)
+        file_path = os.path.join(output_dir, initial_name)
+        df.to_csv(file_path, index=False)
+        total_rows += len(df)
+        total_bytes += os.path.getsize(file_path)
+    return {'rows': total_rows, 'bytes': total_bytes}
+
+@contextlib.contextmanager
+def timed_stages(module, stage_names, stages):
+    """
+    Wrap the named functions of a script module so every call is timed.
+
+    The entry points look their helpers up on the module at call time, so replacing them
+    here times the real run. Each stage accumulates its call count, wall time and traced
+    memory peak (Python allocations in this process) in stages. The originals are restored on exit.
+    """
+    originals = {name: getattr(module, name) for name in stage_names if hasattr(module, name)}
+
+    def wrap(name, function):
+        def timed(*args, **kwargs):
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                stage = stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_traced_mb': 0.0})
+                stage['calls'] += 1
+                stage['seconds'] += elapsed
+                stage['peak_traced_mb'] = max(stage['peak_traced_mb'], peak)
+        return timed
+
+    for name, function in originals.items():
+        setattr(module, name, wrap(name, function))
+    try:
+        yield stages
+    finally:
+        for name, function in originals.items():
+            setattr(module, name, function)
+
+def run_benchmark_step(module, stage_names, entry_point, folder, kwargs, trace_memory):
+    """
+    Run one script's entry point (run_curation / run_validation) on folder with its stages
+    timed and its output captured.
+
+    Returns the stage timings, total wall time, traced peak memory and exit code.
+    """
+    stages = {}
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with timed_stages(module, stage_names, stages), contextlib.redirect_stdout(io.StringIO()):
+            exit_code = getattr(module, entry_point)(folder, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    if trace_memory:
+        # Each stage resets the traced peak, so the run's peak is the largest of them all
+        peak = max([peak] + [stage['peak_traced_mb'] for stage in stages.values()])
+    else:
+        for stage in stages.values():
+            stage['peak_traced_mb'] = None
+    return {'seconds': seconds, 'peak_traced_mb': peak, 'exit_code': exit_code, 'stages': stages}
+
+def run_benchmark(
+    work_dir, subjects=1000, visits=4, rows=None, control_fraction=0.2, seed=0, repeat=1,
+    single_pass=True, workers=1, chunksize=None, max_memory_mb=None, output_formats=('csv',),
+    trace_memory=True
+):
+    """
+    Generate a synthetic cohort in work_dir and benchmark curation and validation on it.
+
+    Every repetition starts from a fresh copy of the generated exports, so each one is a
+    full (not incremental) curation. Returns the report as a dict.
+    """
+    source_dir = os.path.join(work_dir, 'source')
+    start = time.perf_counter()
+    dataset = generate_neurobank_files(source_dir, subjects, visits, rows, control_fraction, seed)
+    dataset['generate_seconds'] = time.perf_counter() - start
+    print(f"Generated {dataset['rows']} rows ({dataset['bytes'] / (1024 * 1024):.1f} MB) in {source_dir}")
+
+    runs = []
+    for run_number in range(1, repeat + 1):
+        run_dir = os.path.join(work_dir, f"run{run_number}")
+        shutil.rmtree(run_dir, ignore_errors=True)
+        shutil.copytree(source_dir, run_dir)
+        curation = run_benchmark_step(
+            clinical_Data_Curation, CURATION_STAGES, 'run_curation', run_dir,
+            {
+                'single_pass': single_pass, 'workers': workers, 'chunksize': chunksize,
+                'max_memory_mb': max_memory_mb, 'output_formats': output_formats,
+            },
+            trace_memory,
+        )
+        validation = run_benchmark_step(
+            clinical_Package_Validation, VALIDATION_STAGES, 'run_validation',
+            os.path.join(run_dir, 'Clinical'),
+            {'chunksize': chunksize, 'max_memory_mb': max_memory_mb},
+            trace_memory,
+        )
+        runs.append({'curation': curation, 'validation': validation})
+        print(f"Run {run_number}: curation {curation['seconds']:.2f}s, validation {validation['seconds']:.2f}s")
+        if curation['exit_code'] or validation['exit_code']:
+            print(f"Warning: Run {run_number} exited with codes {curation['exit_code']} (curation) and {validation['exit_code']} (validation).")
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return {
+        'version': REPORT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'subjects': subjects, 'visits': visits, 'rows': rows, 'control_fraction': control_fraction,
+            'seed': seed, 'repeat': repeat, 'single_pass': single_pass, 'workers': workers,
+            'chunksize': chunksize, 'max_memory_mb': max_memory_mb, 'output_formats': list(output_formats),
+            'trace_memory': trace_memory,
+        },
+        'dataset': dataset,
+        'runs': runs,
+        'best': best_stage_seconds(runs),
+        'peak_rss_mb': {
+            'self': clinical_Run_Report.peak_rss_mb(),
+            'children': clinical_Run_Report.peak_rss_mb(children=True),
+        },
+    }
+
+def best_stage_seconds(runs):
+    """Return the fastest time of every stage (and of each whole script) across the runs."""
+    best = {}
+    for run in runs:
+        for script, result in run.items():
+            timings = {'total': result['seconds']}
+            timings.update({name: stage['seconds'] for name, stage in result['stages'].items()})
+            for name, seconds in timings.items():
+                key = f"{script}.{name}"
+                best[key] = min(best.get(key, seconds), seconds)
+    return best
+
+def compare_reports(report, baseline, tolerance=0.2, min_seconds=0.05):
+    """
+    Print the best stage times of report against baseline.
+
+    Returns the stages that are more than tolerance (a fraction) slower than the
+    baseline; stages under min_seconds in both reports are too noisy to flag.
+    """
+    if baseline.get('config', {}).get('subjects') != report['config']['subjects']:
+        print("Warning: The baseline was run on a different cohort size; timings are not directly comparable.")
+    regressions = []
+    print(f"\n{'Stage':<50} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for key, seconds in report['best'].items():
+        previous = baseline.get('best', {}).get(key)
+        if previous is None:
+            print(f"{key:<50} {'-':>10} {seconds:>9.3f}s {'new':>8}")
+            continue
+        change = (seconds - previous) / previous if previous > 0 else 0.0
+        flag = ''
+        if change > tolerance and max(seconds, previous) >= min_seconds:
+            regressions.append(key)
+            flag = '  <-- slower'
+        print(f"{key:<50} {previous:>9.3f}s {seconds:>9.3f}s {change:>+7.0%}{flag}")
+    return regressions
+
+def print_benchmark_summary(report):
+    """Print the best time and traced peak memory of every stage."""
+    print("\n=== Benchmark Summary ===")
+    last_run = report['runs'][-1]
+    for script, result in last_run.items():
+        for name, stage in result['stages'].items():
+            seconds = report['best'][f"{script}.{name}"]
+            peak = stage['peak_traced_mb']
+            memory = f"{peak:>9.1f} MB" if peak is not None else ''
+            print(f"{script + '.' + name:<50} {seconds:>9.3f}s {memory}")
+        print(f"{script + '.total':<50} {report['best'][script + '.total']:>9.3f}s")
+    if report['peak_rss_mb']['self'] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']['self']:.1f} MB (worker processes: {report['peak_rss_mb']['children']:.1f} MB)")
+    print("=========================\n")
+
+def main(args):
+    """Main function to generate the synthetic cohort, run the benchmark and write the report."""
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='clinical_benchmark_')
+    try:
+        report = run_benchmark(
+            work_dir, subjects=args.subjects, visits=args.visits, rows=args.rows,
+            control_fraction=args.control_fraction, seed=args.seed, repeat=args.repeat,
+            single_pass=not args.legacy, workers=args.workers, chunksize=args.chunksize,
+            max_memory_mb=args.max_memory_mb, output_formats=('csv', *args.formats),
+            trace_memory=not args.no_tracemalloc
+        )
+    finally:
+        if not args.keep and args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print_benchmark_summary(report)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote benchmark report {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stages are more than {args.tolerance:.0%} slower than {args.compare}.")
+            return 1
+        print(f"\nNo stage is more than {args.tolerance:.0%} slower than {args.compare}.")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Clinical Data curation and validation on a synthetic NeuroBANK cohort.")
+    parser.add_argument("--subjects", type=int, default=1000, help="Number of subjects in 'subjects.csv' (default: 1000).")
+    parser.add_argument("--visits", type=int, default=4, help="Rows per subject in every other table (default: 4).")
+    parser.add_argument("--rows", type=int, default=None, help="Rows in every table except 'subjects.csv'; overrides --visits.")
+    parser.add_argument("--control-fraction", type=float, default=0.2, help="Share of subjects that are controls (default: 0.2).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated data (default: 0).")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of timed runs; the report keeps every run and the best time per stage.")
+    parser.add_argument("--legacy", action="store_true", help="Benchmark the step-by-step curation instead of the single pass.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes used by the curation (default: 1).")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream files in chunks of this many rows.")
+    parser.add_argument("--max-memory-mb", type=float, default=None, help="Stream files in chunks sized to stay under this much memory.")
+    parser.add_argument(
+        "--format", dest="formats", action="append", choices=sorted(clinical_Data_Curation.COLUMNAR_EXTENSIONS), default=[],
+        help="Also write this columnar format during curation; may be repeated."
+    )
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Do not trace Python allocations (faster, but no per-stage memory peaks).")
+    parser.add_argument("--work-dir", default=None, help="Folder for the generated data (default: a temporary folder that is removed afterwards).")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary folder with the generated data.")
+    parser.add_argument("--output", default="benchmark_report.json", help="Path of the JSON report (default: benchmark_report.json).")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to compare the best stage times against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Fraction by which a stage may be slower than the baseline before it counts as a regression (default: 0.2)."
+    )
+    args = parser.parse_args()
+    if args.subjects < 1:
+        parser.error("--subjects must be at least 1")
+    if args.visits < 1 or (args.rows is not None and args.rows < 1):
+        parser.error("--visits and --rows must be at least 1")
+    if not 0 <= args.control_fraction <= 1:
+        parser.error("--control-fraction must be between 0 and 1")
+    if args.repeat < 1 or args.workers < 1:
+        parser.error("--repeat and --workers must be at least 1")
+    sys.exit(main(args))
@@ -0,0 +1,268 @@
+# clinical_run_report.py
+
+"""
+Run report for the Clinical Data scripts.
+
+Records the wall time, peak memory and error count of every stage of a run. Stages that
+work file by file also get the rows and bytes read and written for each file, and on
+Linux the peak memory of each file on its own. The
+report is written as one JSON document or appended as JSON Lines (one record per file,
+per stage and per run) and can be printed as a summary table.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+# File statuses counted as errors in stage and run totals ('invalid': failed validation)
+ERROR_STATUSES = ('error', 'missing', 'invalid')
+
+# Per-file counters summed into the stage totals
+FILE_COUNTERS = ('rows_read', 'rows_written', 'bytes_read', 'bytes_written')
+
+# Number of slowest files listed in the summary table
+SUMMARY_SLOWEST_FILES = 10
+
+# Linux only: writing '5' here resets the process's peak RSS (VmHWM in /proc/self/status)
+CLEAR_REFS_PATH = '/proc/self/clear_refs'
+PROC_STATUS_PATH = '/proc/self/status'
+
+# Peaks (MB) hidden from getrusage by the per-file resets: this process's peak before
+# its last reset, and the per-file peaks reported back by worker processes
+_reset_peaks_mb = {'self': 0.0, 'children': 0.0}
+
+def peak_rss_mb(children=False):
+    """Return the peak resident set size of this process (or of its finished child processes) in MB."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return max(resource.getrusage(who).ru_maxrss / unit, _reset_peaks_mb['children' if children else 'self'])
+
+def current_peak_rss_mb():
+    """Return this process's peak RSS since its last reset_peak_rss() in MB, or None if it is not available."""
+    try:
+        with open(PROC_STATUS_PATH) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss():
+    """
+    Reset this process's peak RSS so the next one measured belongs to a single file.
+
+    Only possible on Linux; returns False elsewhere. Resetting also lowers getrusage's
+    ru_maxrss, so the peak so far is kept for peak_rss_mb().
+    """
+    peak = current_peak_rss_mb()
+    if peak is None:
+        return False
+    try:
+        with open(CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    _reset_peaks_mb['self'] = max(_reset_peaks_mb['self'], peak)
+    return True
+
+def record_worker_peaks(results):
+    """Keep the per-file peak RSS of results from other processes for peak_rss_mb(children=True)."""
+    pid = os.getpid()
+    for result in results:
+        if result.get('pid') not in (None, pid) and result.get('peak_rss_mb') is not None:
+            _reset_peaks_mb['children'] = max(_reset_peaks_mb['children'], result['peak_rss_mb'])
+
+def file_size(*file_paths):
+    """Return the total size in bytes of the given files that exist."""
+    return sum(os.path.getsize(path) for path in file_paths if os.path.exists(path))
+
+class FileMetrics:
+    """
+    Rows and bytes read and written while one file is processed, timed from creation.
+
+    Creating it resets the process's peak RSS where possible (see reset_peak_rss), so
+    the peak reported by finish() is that of this file alone; one file is measured at a
+    time per process.
+    """
+
+    def __init__(self):
+        self.peak_reset = reset_peak_rss()
+        self.start = time.perf_counter()
+        self.rows_read = 0
+        self.rows_written = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def read(self, rows, nbytes=0):
+        self.rows_read += rows
+        self.bytes_read += nbytes
+
+    def wrote(self, rows, nbytes=0):
+        self.rows_written += rows
+        self.bytes_written += nbytes
+
+    def finish(self):
+        """
+        Return the metrics as a dict, with the time elapsed, the file's peak RSS (None
+        where it cannot be measured on its own) and the ID of the process it ran in.
+        """
+        return {
+            'seconds': round(time.perf_counter() - self.start, 6),
+            'rows_read': self.rows_read,
+            'rows_written': self.rows_written,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_rss_mb': current_peak_rss_mb() if self.peak_reset else None,
+            'pid': os.getpid(),
+        }
+
+def file_result(file_path, metrics, error=None):
+    """
+    Return the per-file result dict of a stage: file path, status, error message and metrics.
+
+    The status is 'ok' without an error, 'missing' for FileNotFoundError and 'error' otherwise.
+    """
+    if error is None:
+        status = 'ok'
+    elif isinstance(error, FileNotFoundError):
+        status = 'missing'
+    else:
+        status = 'error'
+    return {
+        'file_path': file_path, 'status': status, 'error': None if error is None else str(error),
+        **metrics.finish()
+    }
+
+class RunReport:
+    """
+    Stage-by-stage report of one run of a script.
+
+    Stages are recorded with the stage() context manager. Per-file results (dicts with
+    'file_path', 'status', 'error' and the FileMetrics fields) are added to the stage's
+    'files' list and summed into its totals when the stage ends.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.started = datetime.now(timezone.utc)
+        self.run_id = f"{self.started.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        record = {'stage': name, 'files': []}
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield record
+        except Exception:
+            failed = True
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            record_worker_peaks(record['files'])
+            record['peak_rss_mb'] = peak_rss_mb()
+            record['workers_peak_rss_mb'] = peak_rss_mb(children=True)
+            for counter in FILE_COUNTERS:
+                record[counter] = sum(result.get(counter) or 0 for result in record['files'])
+            statuses = {}
+            for result in record['files']:
+                statuses[result['status']] = statuses.get(result['status'], 0) + 1
+            record['statuses'] = statuses
+            record['errors'] = sum(statuses.get(status, 0) for status in ERROR_STATUSES) + int(failed)
+            self.stages.append(record)
+
+    def to_dict(self):
+        """Return the whole report as a JSON-serializable dict."""
+        if self.seconds is None:
+            self.seconds = round(time.perf_counter() - self.start, 6)
+        return {
+            'run_id': self.run_id,
+            'script': self.script,
+            'started': self.started.isoformat(timespec='seconds'),
+            'seconds': self.seconds,
+            'peak_rss_mb': peak_rss_mb(),
+            'workers_peak_rss_mb': peak_rss_mb(children=True),
+            'errors': sum(stage['errors'] for stage in self.stages),
+            'stages': self.stages,
+        }
+
+    def write(self, report_path):
+        """
+        Write the report to report_path.
+
+        A '.jsonl' path gets one line per file, per stage and for the run appended to it,
+        so successive runs accumulate in the same file. Any other path gets the report as
+        one JSON document, replacing the previous one.
+        """
+        report = self.to_dict()
+        if report_path.endswith('.jsonl'):
+            with open(report_path, 'a', encoding='utf-8') as f:
+                for stage in report['stages']:
+                    for result in stage['files']:
+                        f.write(json.dumps({
+                            'record': 'file', 'run_id': self.run_id, 'script': self.script,
+                            'stage': stage['stage'], **result
+                        }) + '\n')
+                    stage_totals = {key: value for key, value in stage.items() if key != 'files'}
+                    f.write(json.dumps({
+                        'record': 'stage', 'run_id': self.run_id, 'script': self.script, **stage_totals
+                    }) + '\n')
+                run_totals = {key: value for key, value in report.items() if key != 'stages'}
+                f.write(json.dumps({'record': 'run', **run_totals}) + '\n')
+        else:
+            temp_path = f"{report_path}.part"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            os.replace(temp_path, report_path)
+        print(f"Wrote run report {report_path}")
+
+    def print_summary(self):
+        """Print every stage's totals and the slowest files of the run as a table."""
+        report = self.to_dict()
+        print("\n=== Run Report ===")
+        print(f"{'Stage':<28} {'Files':>5} {'Rows read':>10} {'Rows written':>12} {'MB read':>8} {'MB written':>10} {'Seconds':>9} {'Errors':>6}")
+        for stage in report['stages']:
+            print(
+                f"{stage['stage']:<28} {len(stage['files']):>5} {stage['rows_read']:>10} {stage['rows_written']:>12} "
+                f"{stage['bytes_read'] / (1024 * 1024):>8.1f} {stage['bytes_written'] / (1024 * 1024):>10.1f} "
+                f"{stage['seconds']:>9.3f} {stage['errors']:>6}"
+            )
+        files = [(stage['stage'], result) for stage in report['stages'] for result in stage['files']]
+        if files:
+            print("\nSlowest files:")
+            files.sort(key=lambda item: item[1].get('seconds') or 0, reverse=True)
+            for stage_name, result in files[:SUMMARY_SLOWEST_FILES]:
+                peak = result.get('peak_rss_mb')
+                print(
+                    f"  {stage_name:<26} {os.path.basename(result['file_path']):<40} "
+                    f"{result.get('seconds') or 0:>9.3f}s  {result.get('rows_read') or 0:>8} rows  "
+                    f"{'' if peak is None else f'{peak:>7.1f} MB  '}[{result['status']}]"
+                )
+        print(f"\nTotal: {report['seconds']:.3f}s, {report['errors']} errors")
+        if report['peak_rss_mb'] is not None:
+            print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB (worker processes: {report['workers_peak_rss_mb']:.1f} MB)")
+        print("==================\n")
+
+    def finish(self, report_path=None, summary=False):
+        """End the run, then write the report and/or print its summary table as requested."""
+        self.seconds = round(time.perf_counter() - self.start, 6)
+        if report_path:
+            self.write(report_path)
+        if summary:
+            self.print_summary()
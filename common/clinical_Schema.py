@@ -0,0 +1,290 @@
+# clinical_schema.py
+
+"""
+Shared schema registry for the NeuroBANK Clinical Data package.
+
+Both the curation and the validation scripts read their table definitions from here:
+the raw and curated filename of every table, its curated column order, and the dtype
+of every column.
+
+Columns are read from CSV without type inference: coded fields as categoricals and
+everything else as text, so values are written back exactly as they were exported.
+The typed view (typed_dtypes / to_typed) adds nullable integers, floats and dates for
+the columnar outputs and for analysis; values that do not parse become missing there,
+while the CSV keeps the original text. The Parquet/Arrow outputs (columnar_dtypes /
+to_columnar) always have the registry types, plus a text '<column>_raw' column next to
+every integer, float and date column holding the values that do not parse, so their
+schema does not depend on the data and no value is lost.
+
+Exports are decoded with the encoding detected for each file (see EncodingDetector);
+curated files are always written, and read back, as UTF-8.
+"""
+
+import codecs
+import re
+import pandas as pd
+
+# Prefix NeuroBANK puts on every exported filename
+RAW_FILENAME_PREFIX = 'v_NB_IATI_'
+
+# Values treated as missing in every column, in addition to pandas' defaults
+NA_VALUES = ['.']
+
+# Rough multiple of a chunk's parsed size held in memory while it is processed
+CHUNK_MEMORY_FACTOR = 3
+
+# Encoding of every curated file written by the curation script
+CURATED_ENCODING = 'utf-8'
+
+# Bytes that are not defined in cp1252; a file containing any of them is read as latin-1
+CP1252_UNDEFINED_BYTES = (b'\x81', b'\x8d', b'\x8f', b'\x90', b'\x9d')
+
+# Bytes read at a time when a file's encoding is detected on its own
+DETECT_BLOCK_SIZE = 1024 * 1024
+
+# (table name, curated column order) for every table in the package
+TABLES = [
+    ('AALSDXFX', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsdx1', 'alsdx2', 'alsdx3', 'alsdxdt', 'blbclmn', 'blbcumn', 'blbelmn', 'elescrlr', 'lleclmn', 'llecumn', 'lleelmn', 'lueclmn', 'luecumn', 'lueelmn', 'rleclmn', 'rlecumn', 'rleelmn', 'rueclmn', 'ruecumn', 'rueelmn', 'trnkclmn', 'trnkcumn', 'trnkelmn']),
+    ('AALSHXFX', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsdxloc', 'diagdt', 'hxax', 'hxaxnk', 'hxaxtr', 'hxaxtrrp', 'hxblb', 'hxblbsch', 'hxblbsw', 'hxgen', 'hxli', 'hxlil', 'hxlilft', 'hxlill', 'hxlilleg', 'hxlilr', 'hxliu', 'hxliuarm', 'hxliuhnd', 'hxliul', 'hxliur', 'hxot', 'hxotsp', 'onsetdt']),
+    ('ALS_CBS', ['Participant_ID', 'SubjectUID', 'Child_Name', 'Visit_Name', 'Visit_Date', 'atta', 'attb1', 'attb1tim', 'attb2', 'attb2tim', 'attc1', 'attc2', 'attscr', 'carbeh', 'carbeh01', 'carbeh02', 'carbeh03', 'carbeh04', 'carbeh05', 'carbeh06', 'carbeh07', 'carbeh08', 'carbeh09', 'carbeh10', 'carbeh11', 'carbeh12', 'carbeh13', 'carbeh14', 'carbeh15', 'cbsdn', 'cbsdnsp', 'cbsdt', 'cbstot', 'cbswrite', 'cgcuranx', 'cgcurcry', 'cgcurdep', 'cgcurftg', 'cgqcnst', 'cgqdn', 'cgqdnsp', 'cgqdt', 'cgqrel', 'con1', 'con2', 'con3', 'con4', 'con5', 'con6', 'con7', 'con8', 'conscr', 'ini01', 'ini02', 'ini03', 'ini04', 'ini05', 'ini06', 'ini07', 'ini08', 'ini09', 'ini10', 'ini11', 'ini12', 'ini13', 'ini14', 'ini15', 'ini16', 'ini17', 'ini18', 'ini19', 'ini20', 'iniscr', 'source', 'sourcesp', 'trka', 'trkb', 'trkc', 'trkcor', 'trkerr', 'trkscr']),
+    ('ALS_Gene_Mutations', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'ang', 'angnd', 'c9orf72', 'c9orfnd', 'fus', 'fusnd', 'mutot', 'mutotsp', 'prgrnnd', 'progran', 'setx', 'setxnd', 'sod1', 'sod1muta', 'sod1nd', 'tau', 'taund', 'tdp43', 'tdp43nd', 'vapb', 'vapbnd', 'vcp', 'vcpnd']),
+    ('ALSFRS_R', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsfdn', 'alsfdnsp', 'alsfrs1', 'alsfrs2', 'alsfrs3', 'alsfrs4', 'alsfrs5', 'alsfrs5a', 'alsfrs5b', 'alsfrs6', 'alsfrs7', 'alsfrs8', 'alsfrs9', 'alsfrsdt', 'alsfrsmd', 'alsfrsr1', 'alsfrsr2', 'alsfrsr3', 'alsfrsrp', 'alsfrssp', 'alsfrst', 'source', 'sourcesp']),
+    ('ANSASFD', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'lnadt', 'moptrb', 'otsp', 'sfdt', 'sfsp']),
+    ('ANSWER_ALS_Medications_Log', ['Participant_ID', 'SubjectUID', 'Form_Name', 'invdrg', 'med', 'meddose', 'medenddt', 'medfreq', 'medfrqsp', 'medind', 'medrte', 'medrtesp', 'medstdt', 'medu', 'meduotsp']),
+    ('ANSWER_ALS_MobileApp', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'madate', 'mobileap']),
+    ('Ashworth_Spasticity_Scale', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'asharml', 'asharmr', 'ashdn', 'ashdnsp', 'ashdt', 'ashlegl', 'ashlegr', 'source', 'sourcesp']),
+    ('Auxiliary_Chemistry', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'acckrslt', 'acckunit', 'accreuni', 'accrrslt', 'acphouni', 'acphrslt', 'acuarslt', 'acuaunit', 'cknorm', 'crenorm', 'labdn', 'labdt', 'ot1norm', 'ot2norm', 'ot3norm', 'phonorm', 'uanorm', 'uot1rslt', 'uot1test', 'uot1unit', 'uot2rslt', 'uot2test', 'uot2unit', 'uot3rslt', 'uot3test', 'uot3unit']),
+    ('Auxiliary_Chemistry_Labs', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'acckrslt', 'acckunit', 'accreuni', 'accrrslt', 'acphouni', 'acphrslt', 'acuarslt', 'acuaunit', 'cknorm', 'crenorm', 'labdn', 'labdt', 'ot1norm', 'ot2norm', 'ot3norm', 'phonorm', 'uanorm', 'uot1rslt', 'uot1test', 'uot1unit', 'uot2rslt', 'uot2test', 'uot2unit', 'uot3rslt', 'uot3test', 'uot3unit']),
+    ('Cerebrospinal_Fluid', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqfzth', 'aliqfztm', 'aliqicth', 'aliqictm', 'aliqth', 'aliqtm', 'aliqvol', 'aliqvolu', 'alqicena', 'alqvolot', 'csfcntth', 'csfcnttm', 'csfcol', 'csfcolth', 'csfcoltm', 'csfdn', 'csfdnsp', 'csfdt', 'csfdur', 'csfspeed', 'possmp', 'possmpsp', 'presmp', 'presmpsp']),
+    ('CNS_Lability_Scale', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'cnslcb', 'cnsldn', 'cnsldnsp', 'cnsldt', 'cnslsq1', 'cnslsq2', 'cnslsq3', 'cnslsq4', 'cnslsq5', 'cnslsq6', 'cnslsq7', 'cnslstot', 'source', 'sourcesp']),
+    ('Demographics', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'age', 'dob', 'ethnic', 'raceamin', 'raceasn', 'raceblk', 'racenh', 'racewt', 'sex']),
+    ('Diaphragm_Pacing_System_Device', ['Participant_ID', 'SubjectUID', 'Form_Name', 'dpsadmin', 'dpsdate', 'dpsdsch', 'dpsrec']),
+    ('DNA_Sample_Collection', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqvolot', 'dnacnt', 'dnacol', 'dnadn', 'dnadnsp', 'dnadt', 'resource', 'smplnygc']),
+    ('Environmental_Questionnaire', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'adesmock', 'aeock', 'asmkerb', 'bfopo', 'bgclmock', 'ceock', 'city1', 'city2', 'cmock', 'concussrb', 'concusstb', 'cssock', 'driavgtb', 'drinktb', 'edrb', 'etlock', 'exerdd', 'fffock', 'fpsrock', 'headrb', 'hptock', 'hsock', 'imrock', 'leveldd', 'lock', 'lpssock', 'maratb', 'milirb', 'mock', 'msock', 'noytb', 'oasock', 'otsptb', 'ottbx1', 'ottbx2', 'outusrb', 'pcsock', 'pock', 'psock', 'smkavgtb', 'smokerb', 'sportdd', 'srock', 'state1', 'state2', 'teck1', 'teck2', 'teck3', 'tmmock', 'where', 'yrsout', 'yrssmktb', 'yrstb']),
+    ('Family_History_Log', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'famgen', 'famguid', 'famher', 'famhx1', 'famrel', 'famrelsp', 'fhals', 'fhalz', 'fharth', 'fhasth', 'fhcanc', 'fhcirc', 'fhdem', 'fhdiab', 'fhdown', 'fhftd', 'fhgen', 'fhgnang', 'fhgnc9', 'fhgnfus', 'fhgnot', 'fhgnotsp', 'fhgnprg', 'fhgnsetx', 'fhgnsod1', 'fhgntau', 'fhgntdp', 'fhgnvapb', 'fhgnvcp', 'fhhbp', 'fhhd', 'fhhrt', 'fhlung', 'fhot', 'fhotsp', 'fhpd', 'fhpsy', 'fhpsysp', 'fhstk']),
+    ('Feeding_Tube_Placement', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'ftpaccdt', 'ftpadmdt', 'ftpdchdt', 'ftpelctv', 'ftpmeth', 'ftpmthsp', 'ftprecdt', 'ftptyp', 'morabort', 'morasp', 'mordth', 'morhem', 'morinf', 'mornaus', 'morot', 'morotsp', 'moroxygn', 'morpain', 'morper', 'source', 'sourcesp']),
+    ('Grip_Strength_Testing', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'grpdtper', 'grpstat', 'lgrpntck', 'lgrpset', 'lgrpsp', 'lgrpspo', 'lgrpt1', 'lgrpt2', 'rgrpntck', 'rgrpset', 'rgrpsp', 'rgrpspo', 'rgrpt1', 'rgrpt2']),
+    ('Hand_Held_Dynamometry', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'hhddn', 'hhddnsp', 'hhdldt', 'ladab', 'ladnt', 'ladntsp', 'ladspo', 'ladt1', 'ladt2', 'ladt3', 'leeab', 'leent', 'leentsp', 'leespo', 'leet1', 'leet2', 'leet3', 'lefab', 'lefnt', 'lefntsp', 'lefspo', 'left1', 'left2', 'left3', 'lfdicab', 'lfdicnt', 'lfdicnts', 'lfdicspo', 'lfdict1', 'lfdict2', 'lfdict3', 'lhfab', 'lhfnt', 'lhfntsp', 'lhfspo', 'lhft1', 'lhft2', 'lhft3', 'lkeab', 'lkent', 'lkentsp', 'lkespo', 'lket1', 'lket2', 'lket3', 'lkfab', 'lkfnt', 'lkfntsp', 'lkfspo', 'lkft1', 'lkft2', 'lkft3', 'lsfab', 'lsfnt', 'lsfntsp', 'lsfspo', 'lsft1', 'lsft2', 'lsft3', 'lweab', 'lwent', 'lwentsp', 'lwespo', 'lwet1', 'lwet2', 'lwet3', 'radab', 'radnt', 'radntsp', 'radspo', 'radt1', 'radt2', 'radt3', 'reeab', 'reent', 'reentsp', 'reespo', 'reet1', 'reet2', 'reet3', 'refab', 'refnt', 'refntsp', 'refspo', 'reft1', 'reft2', 'reft3', 'rfdicab', 'rfdicnt', 'rfdicnts', 'rfdicspo', 'rfdict1', 'rfdict2', 'rfdict3', 'rhfab', 'rhfnt', 'rhfntsp', 'rhfspo', 'rhft1', 'rhft2', 'rhft3', 'rkeab', 'rkent', 'rkentsp', 'rkespo', 'rket1', 'rket2', 'rket3', 'rkfab', 'rkfnt', 'rkfntsp', 'rkfspo', 'rkft1', 'rkft2', 'rkft3', 'rsfab', 'rsfnt', 'rsfntsp', 'rsfspo', 'rsft1', 'rsft2', 'rsft3', 'rweab', 'rwent', 'rwentsp', 'rwespo', 'rwet1', 'rwet2', 'rwet3']),
+    ('Medical_History', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'medhx1', 'medhxdsc', 'medhxprs', 'medhxyr']),
+    ('Mortality', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'aut', 'autdt', 'autobt', 'autpmi', 'auttyp', 'diedcaus', 'dieddt', 'icd10cm', 'source', 'sourcesp']),
+    ('NEUROLOG', ['Participant_ID', 'SubjectUID', 'Form_Name', 'd1ag0', 'd1ag1', 'd1ag2', 'd1ag3', 'd1ag4', 'date1', 'diag1', 'diag2', 'diag3', 'diag4', 'diag5', 'diag6', 'diag7', 'diag8', 'diag9', 'hidden1', 'hidden2', 'neuro', 'other']),
+    ('NIV_Log', ['Participant_ID', 'SubjectUID', 'Form_Name', 'nivcont', 'nivstpdt', 'nivstrdt', 'nivusdur', 'nivusg', 'nivusg1', 'nivusrg1', 'nivusrg2']),
+    ('PBMC_Sample_Collection', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'smplcol', 'smpldn', 'smpldnsp', 'smpldt', 'tbscol', 'tubshdt']),
+    ('Permanent_Assisted_Ventilation', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'pavdt', 'pavyn']),
+    ('Plasma_Sample', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqfrzna', 'alqfrzth', 'alqfrztm', 'alqiceth', 'alqicetm', 'alqth', 'alqtm', 'alqvolot', 'cntdur', 'plspnk', 'smplclth', 'smplcltm', 'smplctth', 'smplcttm', 'smplspd', 'srplcol', 'srpldn', 'srpldnsp', 'srpldt']),
+    ('Reflexes', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'cfrnd', 'cjjnd', 'cjjscr', 'cpsnd', 'cpsscr', 'crcfrscr', 'lanklnd', 'lanklscr', 'lanklwk', 'lbcpnd', 'lbcpscr', 'lbcpwk', 'lbrchnd', 'lbrchscr', 'lbrchwk', 'lbsnd', 'lbsscr', 'lcadnd', 'lcadscr', 'lcclnnd', 'lcclnscr', 'lffnd', 'lffscr', 'lhsnd', 'lhsscr', 'llclnnd', 'llclnscr', 'lptlrnd1', 'lptlrscr', 'lptlrwk', 'ltrcpnd', 'ltrcpscr', 'ltrcpwk', 'ranklnd', 'ranklscr', 'ranklwk', 'rbcpnd', 'rbcpscr', 'rbcpwk', 'rbrchnd', 'rbrchscr', 'rbrchwk', 'rbsnd', 'rbsscr', 'rcadnd', 'rcadscr', 'rcclnnd', 'rcclnscr', 'rffnd', 'rffscr', 'rflxdt', 'rflxst', 'rhsnd', 'rhsscr', 'rlclnnd', 'rlclnscr', 'rptlrnd', 'rptlrscr', 'rptlrwk', 'rtrcpnd', 'rtrcpscr', 'rtrcpwk']),
+    ('Serum_Sample', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqfrzna', 'alqfrzth', 'alqfrztm', 'alqiceth', 'alqicetm', 'alqth', 'alqtm', 'alqvolot', 'cntdur', 'serpnk', 'smplclth', 'smplcltm', 'smplctth', 'smplcttm', 'smplspd', 'srplcol', 'srpldn', 'srpldnsp', 'srpldt']),
+    ('subjects', ['Participant_ID', 'SubjectUID', 'subject_group_id']),
+    ('Tracheostomy', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'admsndt', 'dschgdt', 'rsnothsp', 'trachrsn', 'trchdt', 'trchrcdt']),
+    ('Vital_Capacity', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'fvcl1', 'fvcl2', 'fvcl3', 'fvcnd2', 'fvcnd3', 'fvcndrs2', 'fvcndrs3', 'fvcndsp2', 'fvcndsp3', 'fvcp1', 'fvcp2', 'fvcp3', 'fvcvar', 'source', 'sourcesp', 'svcdn', 'svcdnsp', 'svcdt',
+         'svcl1', 'svcl2', 'svcl3', 'svcnd2', 'svcnd3', 'svcndrs2', 'svcndrs3', 'svcndsp2', 'svcndsp3', 'svcp1', 'svcp2', 'svcp3', 'svcvar', 'vcpos', 'vctyp']),
+    ('Vital_Signs', ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'bmi', 'bparm', 'bpdias', 'bppos', 'bpsys', 'height', 'heightu', 'hr', 'rr', 'source', 'sourcesp', 'temp', 'temprt', 'temprtsp', 'tempu', 'vsdn', 'vsdnsp', 'vsdt', 'weight', 'weightu']),
+]
+
+# Column kinds: 'string' (identifiers and free text), 'category' (coded fields),
+# 'int', 'float' and 'date'. Columns not matched below are coded fields.
+ID_COLUMNS = {'Participant_ID', 'SubjectUID'}
+DATE_COLUMNS = {'Visit_Date', 'dob', 'date1'}
+TEXT_COLUMNS = {
+    'med', 'meddose', 'medind', 'medhxdsc', 'diedcaus', 'icd10cm', 'city1', 'city2',
+    'state1', 'state2', 'where', 'otsptb', 'ottbx1', 'ottbx2', 'uot1test', 'uot2test',
+    'uot3test', 'famguid',
+}
+INT_COLUMNS = {'subject_group_id', 'medhxyr'}
+FLOAT_COLUMNS = {
+    'age', 'bmi', 'height', 'weight', 'hr', 'rr', 'temp', 'bpsys', 'bpdias',
+    'fvcl1', 'fvcl2', 'fvcl3', 'fvcp1', 'fvcp2', 'fvcp3',
+    'svcl1', 'svcl2', 'svcl3', 'svcp1', 'svcp2', 'svcp3',
+    'alsfrst', 'cbstot', 'cnslstot', 'lgrpt1', 'lgrpt2', 'rgrpt1', 'rgrpt2',
+}
+CODED_COLUMNS = {'morasp'}
+DATE_PATTERN = re.compile(r'(dt|date)$')
+TEXT_PATTERN = re.compile(r'sp\d?$')
+HHD_TRIAL_PATTERN = re.compile(r'^[lr](ad|ee|ef|fdic|hf|ke|kf|sf|we)t[123]$')
+
+# pandas dtype of each column kind when reading CSV, in the typed view and in Parquet/Arrow
+CSV_DTYPES = {'string': str, 'category': 'category', 'int': str, 'float': str, 'date': str}
+TYPED_DTYPES = {
+    'string': 'string', 'category': 'category', 'int': 'Int64', 'float': 'Float64',
+    'date': 'datetime64[ns]',
+}
+COLUMNAR_DTYPES = {**TYPED_DTYPES, 'category': 'string'}
+
+# Suffix of the text column that keeps the unparseable values of a typed column in Parquet/Arrow
+RAW_SUFFIX = '_raw'
+
+def define_filenames():
+    """Define initial and curated filenames."""
+    initial_filenames = [RAW_FILENAME_PREFIX + curated_name for curated_name in define_curated_filenames()]
+    curated_filenames = define_curated_filenames()
+    return initial_filenames, curated_filenames
+
+def define_curated_filenames():
+    """Define curated filenames."""
+    return [f"{table_name}.csv" for table_name, _ in TABLES]
+
+def define_headers():
+    """Define the headers for each curated file."""
+    return [list(columns) for _, columns in TABLES]
+
+def column_kind(column):
+    """Return the kind of a column: 'string', 'category', 'int', 'float' or 'date'."""
+    if column in ID_COLUMNS or column in TEXT_COLUMNS:
+        return 'string'
+    if column in CODED_COLUMNS:
+        return 'category'
+    if column in INT_COLUMNS:
+        return 'int'
+    if column in FLOAT_COLUMNS or HHD_TRIAL_PATTERN.match(column):
+        return 'float'
+    if column in DATE_COLUMNS or DATE_PATTERN.search(column):
+        return 'date'
+    if TEXT_PATTERN.search(column):
+        return 'string'
+    return 'category'
+
+def csv_dtypes(columns):
+    """Return the read_csv dtype of each column."""
+    return {column: CSV_DTYPES[column_kind(column)] for column in columns}
+
+def typed_dtypes(columns):
+    """Return the typed-view dtype of each column."""
+    return {column: TYPED_DTYPES[column_kind(column)] for column in columns}
+
+def columnar_dtypes(columns):
+    """Return the dtype of every column of the Parquet/Arrow outputs, raw text columns included."""
+    dtypes = {}
+    for column in columns:
+        kind = column_kind(column)
+        dtypes[column] = COLUMNAR_DTYPES[kind]
+        if kind in ('int', 'float', 'date'):
+            dtypes[column + RAW_SUFFIX] = 'string'
+    return dtypes
+
+def parse_dates(values):
+    """Parse a Series of date strings; values that cannot be parsed become NaT."""
+    values = values.astype(object)
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    # Only values that are not ISO 8601 fall back to per-value parsing
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+    return dates
+
+def to_typed(df, dtypes=None, dropped=None):
+    """
+    Convert a DataFrame read as text to the given dtypes (the typed view by default).
+
+    Values that do not parse as their column's type become missing. With a dropped
+    dict, the number of values lost that way is added to it per column.
+    """
+    dtypes = dtypes or typed_dtypes(df.columns)
+    converted = {}
+    for column, dtype in dtypes.items():
+        values = df[column]
+        if dtype in ('Int64', 'Float64'):
+            numbers = pd.to_numeric(values.astype(object), errors='coerce')
+            if dtype == 'Int64':
+                numbers = numbers.where(numbers % 1 == 0)
+            converted[column] = numbers.astype(dtype)
+        elif dtype == 'datetime64[ns]':
+            converted[column] = parse_dates(values).astype(dtype)
+        else:
+            converted[column] = values.astype(dtype)
+        if dropped is not None:
+            lost = int((values.notna() & converted[column].isna()).sum())
+            if lost:
+                dropped[column] = dropped.get(column, 0) + lost
+    return pd.DataFrame(converted, index=df.index)
+
+def to_columnar(df, unparsed=None):
+    """
+    Convert a DataFrame read as text to the columns of the Parquet/Arrow outputs.
+
+    Values that do not parse as their column's type are missing in the typed column and
+    kept as text in its '<column>_raw' column, which is missing for every other row. With
+    an unparsed dict, the number of such values is added to it per column.
+    """
+    dtypes = columnar_dtypes(df.columns)
+    typed = to_typed(df, {column: dtypes[column] for column in df.columns})
+    converted = {}
+    for column in df.columns:
+        converted[column] = typed[column]
+        if column + RAW_SUFFIX in dtypes:
+            kept = df[column].notna() & typed[column].isna()
+            converted[column + RAW_SUFFIX] = df[column].where(kept).astype('string')
+            count = int(kept.sum())
+            if unparsed is not None and count:
+                unparsed[column] = unparsed.get(column, 0) + count
+    return pd.DataFrame(converted, index=df.index)
+
+class EncodingDetector:
+    """
+    Detect the encoding of a file from its bytes, fed block by block with update().
+
+    finish() returns 'utf-8-sig' for UTF-8 with a byte order mark, 'utf-8' for any
+    other valid UTF-8 (which includes plain ASCII), then 'cp1252' and finally 'latin-1',
+    which decodes any bytes. Meant to share the read of a file with another pass over
+    its blocks, such as hashing it.
+    """
+
+    def __init__(self):
+        self.head = b''
+        self.utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.is_utf8 = True
+        self.is_cp1252 = True
+
+    def update(self, block):
+        if len(self.head) < len(codecs.BOM_UTF8):
+            # The byte order mark may span the first blocks when they are short
+            self.head += block[:len(codecs.BOM_UTF8) - len(self.head)]
+        if self.is_utf8:
+            try:
+                self.utf8_decoder.decode(block)
+            except UnicodeDecodeError:
+                self.is_utf8 = False
+        if self.is_cp1252 and any(byte in block for byte in CP1252_UNDEFINED_BYTES):
+            self.is_cp1252 = False
+
+    def finish(self):
+        if self.is_utf8:
+            try:
+                # A multi-byte sequence cut off at the end of the file is not valid UTF-8
+                self.utf8_decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                self.is_utf8 = False
+        if self.is_utf8:
+            return 'utf-8-sig' if self.head == codecs.BOM_UTF8 else 'utf-8'
+        return 'cp1252' if self.is_cp1252 else 'latin-1'
+
+def detect_encoding(file_path, block_size=DETECT_BLOCK_SIZE):
+    """Return the encoding of a file (see EncodingDetector), reading it once."""
+    detector = EncodingDetector()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            detector.update(block)
+    return detector.finish()
+
+def read_clinical_csv(file_path, columns=None, encoding=None, **kwargs):
+    """
+    Read a Clinical CSV file with the registry dtypes instead of type inference.
+
+    Only the given columns are parsed when columns is set (missing ones are ignored);
+    '.' is read as missing unless na_values is passed. The file's encoding is detected
+    unless it is given. Extra keyword arguments (e.g. chunksize, nrows) are passed on
+    to pd.read_csv.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns
+    selected = [column for column in header if columns is None or column in columns]
+    kwargs.setdefault('na_values', NA_VALUES)
+    return pd.read_csv(file_path, encoding=encoding, usecols=selected, dtype=csv_dtypes(selected), **kwargs)
+
+def estimate_chunksize(file_path, max_memory_mb, columns=None, encoding=None, sample_rows=1000):
+    """Estimate how many rows of a CSV file fit in one chunk under a memory ceiling."""
+    sample = read_clinical_csv(file_path, columns, encoding=encoding, nrows=sample_rows)
+    if sample.empty:
+        return sample_rows
+    bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+    budget = max_memory_mb * 1024 * 1024 / CHUNK_MEMORY_FACTOR
+    return max(1, int(budget // max(bytes_per_row, 1)))
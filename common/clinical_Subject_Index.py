@@ -0,0 +1,341 @@
+# clinical_subject_index.py
+
+"""
+Subject index of a curated 'Clinical' package.
+
+A SQLite file in the 'Clinical' folder records, for every row of every curated CSV,
+the row's SubjectUID and Participant_ID and the byte offset and length of its CSV
+record. The curation script builds it from the bytes it writes, so it costs no extra
+read; files it did not write in a run are scanned once to bring the index up to date.
+
+SubjectIndex answers "which tables hold this subject" from the index alone and
+returns a subject's records from every table by seeking straight to them, without
+scanning the tables.
+"""
+
+import io
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+import clinical_Run_Report
+import clinical_Schema
+
+# Index file written into the 'Clinical' folder
+SUBJECT_INDEX_FILENAME = 'subject_index.sqlite'
+
+# Seconds a connection waits for another process (a curation worker) to finish writing
+SQLITE_TIMEOUT = 60
+
+# Bytes read at a time when a curated file is scanned from disk
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    table_name TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    header_length INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    table_name TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    subject_uid TEXT,
+    participant_id TEXT,
+    byte_offset INTEGER NOT NULL,
+    byte_length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_subject_uid ON records (subject_uid);
+CREATE INDEX IF NOT EXISTS records_participant_id ON records (participant_id);
+CREATE INDEX IF NOT EXISTS records_table_name ON records (table_name);
+"""
+
+def index_path_for(clinical_dir):
+    """Return the path of the subject index in a curated 'Clinical' folder."""
+    return os.path.join(clinical_dir, SUBJECT_INDEX_FILENAME)
+
+def table_name_for(file_path):
+    """Return the index table name of a curated CSV file (its filename without '.csv')."""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def connect(index_path):
+    """Open the subject index, creating its tables if needed."""
+    connection = sqlite3.connect(index_path, timeout=SQLITE_TIMEOUT)
+    connection.executescript(INDEX_SCHEMA)
+    return connection
+
+def record_spans(data):
+    """
+    Return the start and length of every complete CSV record in data (bytes that
+    start at a record boundary).
+
+    Records end at newlines outside double quotes, so quoted values with line breaks
+    stay in one record. Bytes after the last complete record are not included.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord('\n'))
+    if b'"' in data:
+        # uint8 sums wrap around at 256, which keeps their parity
+        quotes = np.cumsum(buffer == ord('"'), dtype=np.uint8)
+        newlines = newlines[quotes[newlines] % 2 == 0]
+    ends = newlines + 1
+    starts = np.zeros(len(ends), dtype=ends.dtype)
+    starts[1:] = ends[:-1]
+    return starts, ends - starts
+
+def index_records(df, offsets, lengths, first_row=0):
+    """Return the index records of DataFrame rows written as CSV records at the given offsets and lengths."""
+    def ids(column):
+        if column not in df.columns:
+            return None
+        values = df[column].astype(object)
+        return values.where(values.notna() & (values != ''), None).to_numpy()
+    return pd.DataFrame({
+        'row_number': np.arange(first_row, first_row + len(df)),
+        'subject_uid': ids('SubjectUID'),
+        'participant_id': ids('Participant_ID'),
+        'byte_offset': offsets,
+        'byte_length': lengths,
+    })
+
+class TableIndexWriter:
+    """
+    Writes the index records of one curated file as its rows are written.
+
+    Records are staged in a table of their own, so they are not held in memory; close()
+    replaces the file's records with them in one transaction once the file is in place,
+    and abort() discards them.
+    """
+
+    def __init__(self, index_path, file_path):
+        self.file_path = file_path
+        self.table_name = table_name_for(file_path)
+        self.staging_table = f'"staging:{self.table_name}"'
+        self.connection = connect(index_path)
+        with self.connection:
+            # Left over if a run was killed while writing this file
+            self.connection.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+            self.connection.execute(
+                f"CREATE TABLE {self.staging_table} (row_number INTEGER, subject_uid TEXT, participant_id TEXT, "
+                "byte_offset INTEGER, byte_length INTEGER)"
+            )
+
+    def write(self, records):
+        """Stage index records (see index_records)."""
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO {self.staging_table} VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    records['row_number'].tolist(), records['subject_uid'].tolist(),
+                    records['participant_id'].tolist(), records['byte_offset'].tolist(), records['byte_length'].tolist()
+                )
+            )
+
+    def close(self):
+        stat = os.stat(self.file_path)
+        with open(self.file_path, 'rb') as f:
+            header_length = len(f.readline())
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM records WHERE table_name = ?", (self.table_name,))
+                # Inserting in SubjectUID order keeps the index B-tree updates local, which is several times faster
+                self.connection.execute(
+                    f"INSERT INTO records SELECT ?, row_number, subject_uid, participant_id, byte_offset, byte_length "
+                    f"FROM {self.staging_table} ORDER BY subject_uid, row_number",
+                    (self.table_name,)
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?, ?)",
+                    (self.table_name, os.path.basename(self.file_path), header_length, stat.st_size, stat.st_mtime_ns)
+                )
+                self.connection.execute(f"DROP TABLE {self.staging_table}")
+        finally:
+            self.connection.close()
+            self.connection = None
+
+    def abort(self):
+        if self.connection is None:
+            return
+        try:
+            with self.connection:
+                self.connection.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+        finally:
+            self.connection.close()
+            self.connection = None
+
+def write_table(index_path, file_path, records):
+    """Replace the index records of a curated file with records (see index_records)."""
+    writer = TableIndexWriter(index_path, file_path)
+    try:
+        writer.write(records)
+    except Exception:
+        writer.abort()
+        raise
+    writer.close()
+
+def scan_file(file_path):
+    """Return the index records of a curated file read from disk: its ID columns and record spans."""
+    offsets, lengths = [], []
+    position, carry = 0, b''
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(SCAN_BLOCK_SIZE), b''):
+            # A record cut off at the end of a block is carried over to the next one
+            data = carry + block
+            starts, sizes = record_spans(data)
+            offsets.append(starts + position)
+            lengths.append(sizes)
+            consumed = int(starts[-1] + sizes[-1]) if len(starts) else 0
+            carry = data[consumed:]
+            position += consumed
+        if carry:
+            # Last record without a trailing newline
+            offsets.append(np.array([position]))
+            lengths.append(np.array([len(carry)]))
+    offsets = np.concatenate(offsets or [np.array([], dtype=np.int64)])
+    lengths = np.concatenate(lengths or [np.array([], dtype=np.int64)])
+    # The first record is the header
+    ids = clinical_Schema.read_clinical_csv(
+        file_path, ['SubjectUID', 'Participant_ID'], encoding=clinical_Schema.CURATED_ENCODING, na_values=[]
+    )
+    if len(ids) != len(offsets) - 1:
+        raise ValueError(f"Found {len(offsets) - 1} CSV records but {len(ids)} rows in {file_path}")
+    return index_records(ids, offsets[1:], lengths[1:])
+
+def is_current(index_path, file_path):
+    """Return True if the index holds the records of the curated file as it is on disk."""
+    if not os.path.exists(index_path) or not os.path.exists(file_path):
+        return False
+    connection = connect(index_path)
+    try:
+        indexed = connection.execute(
+            "SELECT file_size, file_mtime_ns FROM tables WHERE table_name = ?", (table_name_for(file_path),)
+        ).fetchone()
+    finally:
+        connection.close()
+    stat = os.stat(file_path)
+    return indexed == (stat.st_size, stat.st_mtime_ns)
+
+def update_index(index_path, curated_filepaths):
+    """
+    Bring the index up to date with the curated files on disk.
+
+    Files whose size or modification time differ from the index are scanned and
+    re-indexed; files that do not exist are dropped from it. Returns the per-file
+    results (see clinical_Run_Report.file_result) of the files that were scanned.
+    """
+    results = []
+    connect(index_path).close()
+    for file_path in curated_filepaths:
+        if not os.path.exists(file_path):
+            drop_table(index_path, file_path)
+            continue
+        if is_current(index_path, file_path):
+            continue
+        metrics = clinical_Run_Report.FileMetrics()
+        try:
+            records = scan_file(file_path)
+            metrics.read(len(records), os.path.getsize(file_path))
+            write_table(index_path, file_path, records)
+            print(f"Indexed subjects in {file_path}")
+            results.append(clinical_Run_Report.file_result(file_path, metrics))
+        except Exception as e:
+            print(f"Error indexing subjects in {file_path}: {e}")
+            drop_table(index_path, file_path)
+            results.append(clinical_Run_Report.file_result(file_path, metrics, e))
+    return results
+
+def drop_table(index_path, file_path):
+    """Remove a curated file's records from the index."""
+    table_name = table_name_for(file_path)
+    connection = connect(index_path)
+    try:
+        with connection:
+            connection.execute("DELETE FROM records WHERE table_name = ?", (table_name,))
+            connection.execute("DELETE FROM tables WHERE table_name = ?", (table_name,))
+    finally:
+        connection.close()
+
+class SubjectIndex:
+    """
+    Query API over the subject index of a curated 'Clinical' folder.
+
+    Subjects are looked up by SubjectUID or Participant_ID. Records are read from the
+    curated CSVs at their indexed byte offsets, with the registry dtypes; a file that
+    changed since it was indexed raises ValueError instead of returning wrong rows.
+
+        with SubjectIndex(clinical_dir) as index:
+            records = index.records('NEU0000042')  # {table name: DataFrame}
+    """
+
+    def __init__(self, clinical_dir, index_path=None):
+        self.clinical_dir = clinical_dir
+        self.index_path = index_path or index_path_for(clinical_dir)
+        if not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"No subject index at {self.index_path}. Run the curation script first.")
+        self.connection = sqlite3.connect(self.index_path, timeout=SQLITE_TIMEOUT)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def subjects(self):
+        """Return every indexed SubjectUID."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT subject_uid FROM records WHERE subject_uid IS NOT NULL ORDER BY subject_uid"
+        )
+        return [uid for uid, in rows]
+
+    def tables(self, subject):
+        """Return the number of rows per table that hold the subject, as {table name: row count}."""
+        rows = self.connection.execute(
+            "SELECT table_name, COUNT(*) FROM records WHERE subject_uid = ? OR participant_id = ? "
+            "GROUP BY table_name ORDER BY table_name",
+            (subject, subject)
+        )
+        return dict(rows.fetchall())
+
+    def records(self, subject, tables=None):
+        """
+        Return the subject's rows from every table that holds them, as {table name: DataFrame}.
+
+        tables limits the lookup to the given table names. Each DataFrame has the
+        table's curated columns and the subject's rows in file order.
+        """
+        rows = self.connection.execute(
+            "SELECT r.table_name, t.file_name, t.header_length, t.file_size, t.file_mtime_ns, "
+            "r.byte_offset, r.byte_length FROM records r JOIN tables t ON t.table_name = r.table_name "
+            "WHERE r.subject_uid = ? OR r.participant_id = ? ORDER BY r.table_name, r.byte_offset",
+            (subject, subject)
+        ).fetchall()
+        spans = {}
+        for table_name, file_name, header_length, file_size, mtime_ns, offset, length in rows:
+            if tables is None or table_name in tables:
+                spans.setdefault((table_name, file_name, header_length, file_size, mtime_ns), []).append((offset, length))
+        return {
+            table_name: self.read_rows(file_name, header_length, file_size, mtime_ns, table_spans)
+            for (table_name, file_name, header_length, file_size, mtime_ns), table_spans in spans.items()
+        }
+
+    def read_rows(self, file_name, header_length, file_size, mtime_ns, spans):
+        """Read the CSV records at the given (offset, length) spans of a curated file into a DataFrame."""
+        file_path = os.path.join(self.clinical_dir, file_name)
+        stat = os.stat(file_path)
+        if (stat.st_size, stat.st_mtime_ns) != (file_size, mtime_ns):
+            raise ValueError(f"{file_path} changed after it was indexed. Run the curation script again.")
+        with open(file_path, 'rb') as f:
+            parts = [f.read(header_length)]
+            for offset, length in spans:
+                f.seek(offset)
+                parts.append(f.read(length))
+        header = pd.read_csv(io.BytesIO(parts[0]), encoding=clinical_Schema.CURATED_ENCODING, nrows=0).columns
+        return pd.read_csv(
+            io.BytesIO(b''.join(parts)), encoding=clinical_Schema.CURATED_ENCODING,
+            dtype=clinical_Schema.csv_dtypes(header), na_values=clinical_Schema.NA_VALUES
+        )
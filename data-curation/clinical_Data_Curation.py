@@ -1,147 +1,164 @@
 # clinical_data_curation.py
 
+import argparse
+import errno
+import hashlib
+import json
 import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 
+for shared_dir in ('common', 'validation'):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', shared_dir))
+import clinical_Package_Validation
+import clinical_Run_Report
+import clinical_Schema
+import clinical_Subject_Index
+from clinical_Schema import define_filenames, define_headers
+
+# Exit codes of run_curation / main: success, curation or validation failures, unusable input
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# Columnar formats that can be written next to each curated CSV, and their file extensions
+COLUMNAR_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Manifest of source/output hashes written into the 'Clinical' folder for incremental re-runs
+MANIFEST_FILENAME = 'curation_manifest.json'
+
+# Rows per chunk when only Participant_IDs are rewritten in an already curated file
+REMAP_CHUNKSIZE = 100000
+
+# Rows converted to CSV text at a time when a DataFrame is written
+CSV_WRITE_ROWS = 10000
+
+# Per-file record of completed stages, kept in the 'Clinical' folder until a run ends without errors
+CHECKPOINT_FILENAME = 'curation_checkpoint.json'
+
+# Checkpoint stage of a file curated (or remapped) by curate_files_single_pass
+SINGLE_PASS_STAGE = 'curate_files_single_pass'
+
+# Validation rules a file must pass to be written with --validate; the others are only reported
+BLOCKING_RULES = clinical_Package_Validation.PARTICIPANT_ID_RULES
+
 def get_filepaths():
-    """Prompt user for the clinical data folder path and return it with a trailing backslash."""
+    """Prompt user for the clinical data folder path and return it."""
     filepath = input(
         "Please put all of the Clinical Data files provided by NeuroBANK into one shared folder, "
         "and then provide the filepath to said folder:\n"
     ).strip()
-    if not filepath.endswith("\\"):
-        filepath += "\\"
     return filepath
 
-def define_filenames():
-    """Define initial and curated filenames."""
-    initial_filenames = [
-        'v_NB_IATI_AALSDXFX.csv', 'v_NB_IATI_AALSHXFX.csv', 'v_NB_IATI_ALS_CBS.csv',
-        'v_NB_IATI_ALS_Gene_Mutations.csv', 'v_NB_IATI_ALSFRS_R.csv', 'v_NB_IATI_ANSASFD.csv',
-        'v_NB_IATI_ANSWER_ALS_Medications_Log.csv', 'v_NB_IATI_ANSWER_ALS_MobileApp.csv',
-        'v_NB_IATI_Ashworth_Spasticity_Scale.csv', 'v_NB_IATI_Auxiliary_Chemistry.csv',
-        'v_NB_IATI_Auxiliary_Chemistry_Labs.csv', 'v_NB_IATI_Cerebrospinal_Fluid.csv',
-        'v_NB_IATI_CNS_Lability_Scale.csv', 'v_NB_IATI_Demographics.csv',
-        'v_NB_IATI_Diaphragm_Pacing_System_Device.csv', 'v_NB_IATI_DNA_Sample_Collection.csv',
-        'v_NB_IATI_Environmental_Questionnaire.csv', 'v_NB_IATI_Family_History_Log.csv',
-        'v_NB_IATI_Feeding_Tube_Placement.csv', 'v_NB_IATI_Grip_Strength_Testing.csv',
-        'v_NB_IATI_Hand_Held_Dynamometry.csv', 'v_NB_IATI_Medical_History.csv',
-        'v_NB_IATI_Mortality.csv', 'v_NB_IATI_NEUROLOG.csv', 'v_NB_IATI_NIV_Log.csv',
-        'v_NB_IATI_PBMC_Sample_Collection.csv', 'v_NB_IATI_Permanent_Assisted_Ventilation.csv',
-        'v_NB_IATI_Plasma_Sample.csv', 'v_NB_IATI_Reflexes.csv', 'v_NB_IATI_Serum_Sample.csv',
-        'v_NB_IATI_subjects.csv', 'v_NB_IATI_Tracheostomy.csv', 'v_NB_IATI_Vital_Capacity.csv',
-        'v_NB_IATI_Vital_Signs.csv'
-    ]
-
-    curated_filenames = [
-        'AALSDXFX.csv', 'AALSHXFX.csv', 'ALS_CBS.csv', 'ALS_Gene_Mutations.csv',
-        'ALSFRS_R.csv', 'ANSASFD.csv', 'ANSWER_ALS_Medications_Log.csv',
-        'ANSWER_ALS_MobileApp.csv', 'Ashworth_Spasticity_Scale.csv',
-        'Auxiliary_Chemistry.csv', 'Auxiliary_Chemistry_Labs.csv',
-        'Cerebrospinal_Fluid.csv', 'CNS_Lability_Scale.csv', 'Demographics.csv',
-        'Diaphragm_Pacing_System_Device.csv', 'DNA_Sample_Collection.csv',
-        'Environmental_Questionnaire.csv', 'Family_History_Log.csv',
-        'Feeding_Tube_Placement.csv', 'Grip_Strength_Testing.csv',
-        'Hand_Held_Dynamometry.csv', 'Medical_History.csv', 'Mortality.csv',
-        'NEUROLOG.csv', 'NIV_Log.csv', 'PBMC_Sample_Collection.csv',
-        'Permanent_Assisted_Ventilation.csv', 'Plasma_Sample.csv', 'Reflexes.csv',
-        'Serum_Sample.csv', 'subjects.csv', 'Tracheostomy.csv',
-        'Vital_Capacity.csv', 'Vital_Signs.csv'
-    ]
-
-    # Ensure that the number of initial and curated filenames match
-    assert len(initial_filenames) == len(curated_filenames), "Filename lists must be of the same length."
-
-    return initial_filenames, curated_filenames
-
-def define_headers():
-    """Define the headers for each curated file."""
-    headers = [
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsdx1', 'alsdx2', 'alsdx3', 'alsdxdt', 'blbclmn', 'blbcumn', 'blbelmn', 'elescrlr', 'lleclmn', 'llecumn', 'lleelmn', 'lueclmn', 'luecumn', 'lueelmn', 'rleclmn', 'rlecumn', 'rleelmn', 'rueclmn', 'ruecumn', 'rueelmn', 'trnkclmn', 'trnkcumn', 'trnkelmn'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsdxloc', 'diagdt', 'hxax', 'hxaxnk', 'hxaxtr', 'hxaxtrrp', 'hxblb', 'hxblbsch', 'hxblbsw', 'hxgen', 'hxli', 'hxlil', 'hxlilft', 'hxlill', 'hxlilleg', 'hxlilr', 'hxliu', 'hxliuarm', 'hxliuhnd', 'hxliul', 'hxliur', 'hxot', 'hxotsp', 'onsetdt'],
-        ['Participant_ID', 'SubjectUID', 'Child_Name', 'Visit_Name', 'Visit_Date', 'atta', 'attb1', 'attb1tim', 'attb2', 'attb2tim', 'attc1', 'attc2', 'attscr', 'carbeh', 'carbeh01', 'carbeh02', 'carbeh03', 'carbeh04', 'carbeh05', 'carbeh06', 'carbeh07', 'carbeh08', 'carbeh09', 'carbeh10', 'carbeh11', 'carbeh12', 'carbeh13', 'carbeh14', 'carbeh15', 'cbsdn', 'cbsdnsp', 'cbsdt', 'cbstot', 'cbswrite', 'cgcuranx', 'cgcurcry', 'cgcurdep', 'cgcurftg', 'cgqcnst', 'cgqdn', 'cgqdnsp', 'cgqdt', 'cgqrel', 'con1', 'con2', 'con3', 'con4', 'con5', 'con6', 'con7', 'con8', 'conscr', 'ini01', 'ini02', 'ini03', 'ini04', 'ini05', 'ini06', 'ini07', 'ini08', 'ini09', 'ini10', 'ini11', 'ini12', 'ini13', 'ini14', 'ini15', 'ini16', 'ini17', 'ini18', 'ini19', 'ini20', 'iniscr', 'source', 'sourcesp', 'trka', 'trkb', 'trkc', 'trkcor', 'trkerr', 'trkscr'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'ang', 'angnd', 'c9orf72', 'c9orfnd', 'fus', 'fusnd', 'mutot', 'mutotsp', 'prgrnnd', 'progran', 'setx', 'setxnd', 'sod1', 'sod1muta', 'sod1nd', 'tau', 'taund', 'tdp43', 'tdp43nd', 'vapb', 'vapbnd', 'vcp', 'vcpnd'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'alsfdn', 'alsfdnsp', 'alsfrs1', 'alsfrs2', 'alsfrs3', 'alsfrs4', 'alsfrs5', 'alsfrs5a', 'alsfrs5b', 'alsfrs6', 'alsfrs7', 'alsfrs8', 'alsfrs9', 'alsfrsdt', 'alsfrsmd', 'alsfrsr1', 'alsfrsr2', 'alsfrsr3', 'alsfrsrp', 'alsfrssp', 'alsfrst', 'source', 'sourcesp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'lnadt', 'moptrb', 'otsp', 'sfdt', 'sfsp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'invdrg', 'med', 'meddose', 'medenddt', 'medfreq', 'medfrqsp', 'medind', 'medrte', 'medrtesp', 'medstdt', 'medu', 'meduotsp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'madate', 'mobileap'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'asharml', 'asharmr', 'ashdn', 'ashdnsp', 'ashdt', 'ashlegl', 'ashlegr', 'source', 'sourcesp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'acckrslt', 'acckunit', 'accreuni', 'accrrslt', 'acphouni', 'acphrslt', 'acuarslt', 'acuaunit', 'cknorm', 'crenorm', 'labdn', 'labdt', 'ot1norm', 'ot2norm', 'ot3norm', 'phonorm', 'uanorm', 'uot1rslt', 'uot1test', 'uot1unit', 'uot2rslt', 'uot2test', 'uot2unit', 'uot3rslt', 'uot3test', 'uot3unit'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'acckrslt', 'acckunit', 'accreuni', 'accrrslt', 'acphouni', 'acphrslt', 'acuarslt', 'acuaunit', 'cknorm', 'crenorm', 'labdn', 'labdt', 'ot1norm', 'ot2norm', 'ot3norm', 'phonorm', 'uanorm', 'uot1rslt', 'uot1test', 'uot1unit', 'uot2rslt', 'uot2test', 'uot2unit', 'uot3rslt', 'uot3test', 'uot3unit'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqfzth', 'aliqfztm', 'aliqicth', 'aliqictm', 'aliqth', 'aliqtm', 'aliqvol', 'aliqvolu', 'alqicena', 'alqvolot', 'csfcntth', 'csfcnttm', 'csfcol', 'csfcolth', 'csfcoltm', 'csfdn', 'csfdnsp', 'csfdt', 'csfdur', 'csfspeed', 'possmp', 'possmpsp', 'presmp', 'presmpsp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'cnslcb', 'cnsldn', 'cnsldnsp', 'cnsldt', 'cnslsq1', 'cnslsq2', 'cnslsq3', 'cnslsq4', 'cnslsq5', 'cnslsq6', 'cnslsq7', 'cnslstot', 'source', 'sourcesp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'age', 'dob', 'ethnic', 'raceamin', 'raceasn', 'raceblk', 'racenh', 'racewt', 'sex'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'dpsadmin', 'dpsdate', 'dpsdsch', 'dpsrec'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqvolot', 'dnacnt', 'dnacol', 'dnadn', 'dnadnsp', 'dnadt', 'resource', 'smplnygc'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'adesmock', 'aeock', 'asmkerb', 'bfopo', 'bgclmock', 'ceock', 'city1', 'city2', 'cmock', 'concussrb', 'concusstb', 'cssock', 'driavgtb', 'drinktb', 'edrb', 'etlock', 'exerdd', 'fffock', 'fpsrock', 'headrb', 'hptock', 'hsock', 'imrock', 'leveldd', 'lock', 'lpssock', 'maratb', 'milirb', 'mock', 'msock', 'noytb', 'oasock', 'otsptb', 'ottbx1', 'ottbx2', 'outusrb', 'pcsock', 'pock', 'psock', 'smkavgtb', 'smokerb', 'sportdd', 'srock', 'state1', 'state2', 'teck1', 'teck2', 'teck3', 'tmmock', 'where', 'yrsout', 'yrssmktb', 'yrstb'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'famgen', 'famguid', 'famher', 'famhx1', 'famrel', 'famrelsp', 'fhals', 'fhalz', 'fharth', 'fhasth', 'fhcanc', 'fhcirc', 'fhdem', 'fhdiab', 'fhdown', 'fhftd', 'fhgen', 'fhgnang', 'fhgnc9', 'fhgnfus', 'fhgnot', 'fhgnotsp', 'fhgnprg', 'fhgnsetx', 'fhgnsod1', 'fhgntau', 'fhgntdp', 'fhgnvapb', 'fhgnvcp', 'fhhbp', 'fhhd', 'fhhrt', 'fhlung', 'fhot', 'fhotsp', 'fhpd', 'fhpsy', 'fhpsysp', 'fhstk'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'ftpaccdt', 'ftpadmdt', 'ftpdchdt', 'ftpelctv', 'ftpmeth', 'ftpmthsp', 'ftprecdt', 'ftptyp', 'morabort', 'morasp', 'mordth', 'morhem', 'morinf', 'mornaus', 'morot', 'morotsp', 'moroxygn', 'morpain', 'morper', 'source', 'sourcesp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'grpdtper', 'grpstat', 'lgrpntck', 'lgrpset', 'lgrpsp', 'lgrpspo', 'lgrpt1', 'lgrpt2', 'rgrpntck', 'rgrpset', 'rgrpsp', 'rgrpspo', 'rgrpt1', 'rgrpt2'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'hhddn', 'hhddnsp', 'hhdldt', 'ladab', 'ladnt', 'ladntsp', 'ladspo', 'ladt1', 'ladt2', 'ladt3', 'leeab', 'leent', 'leentsp', 'leespo', 'leet1', 'leet2', 'leet3', 'lefab', 'lefnt', 'lefntsp', 'lefspo', 'left1', 'left2', 'left3', 'lfdicab', 'lfdicnt', 'lfdicnts', 'lfdicspo', 'lfdict1', 'lfdict2', 'lfdict3', 'lhfab', 'lhfnt', 'lhfntsp', 'lhfspo', 'lhft1', 'lhft2', 'lhft3', 'lkeab', 'lkent', 'lkentsp', 'lkespo', 'lket1', 'lket2', 'lket3', 'lkfab', 'lkfnt', 'lkfntsp', 'lkfspo', 'lkft1', 'lkft2', 'lkft3', 'lsfab', 'lsfnt', 'lsfntsp', 'lsfspo', 'lsft1', 'lsft2', 'lsft3', 'lweab', 'lwent', 'lwentsp', 'lwespo', 'lwet1', 'lwet2', 'lwet3', 'radab', 'radnt', 'radntsp', 'radspo', 'radt1', 'radt2', 'radt3', 'reeab', 'reent', 'reentsp', 'reespo', 'reet1', 'reet2', 'reet3', 'refab', 'refnt', 'refntsp', 'refspo', 'reft1', 'reft2', 'reft3', 'rfdicab', 'rfdicnt', 'rfdicnts', 'rfdicspo', 'rfdict1', 'rfdict2', 'rfdict3', 'rhfab', 'rhfnt', 'rhfntsp', 'rhfspo', 'rhft1', 'rhft2', 'rhft3', 'rkeab', 'rkent', 'rkentsp', 'rkespo', 'rket1', 'rket2', 'rket3', 'rkfab', 'rkfnt', 'rkfntsp', 'rkfspo', 'rkft1', 'rkft2', 'rkft3', 'rsfab', 'rsfnt', 'rsfntsp', 'rsfspo', 'rsft1', 'rsft2', 'rsft3', 'rweab', 'rwent', 'rwentsp', 'rwespo', 'rwet1', 'rwet2', 'rwet3'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'medhx1', 'medhxdsc', 'medhxprs', 'medhxyr'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'aut', 'autdt', 'autobt', 'autpmi', 'auttyp', 'diedcaus', 'dieddt', 'icd10cm', 'source', 'sourcesp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'd1ag0', 'd1ag1', 'd1ag2', 'd1ag3', 'd1ag4', 'date1', 'diag1', 'diag2', 'diag3', 'diag4', 'diag5', 'diag6', 'diag7', 'diag8', 'diag9', 'hidden1', 'hidden2', 'neuro', 'other'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'nivcont', 'nivstpdt', 'nivstrdt', 'nivusdur', 'nivusg', 'nivusg1', 'nivusrg1', 'nivusrg2'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'smplcol', 'smpldn', 'smpldnsp', 'smpldt', 'tbscol', 'tubshdt'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'pavdt', 'pavyn'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqfrzna', 'alqfrzth', 'alqfrztm', 'alqiceth', 'alqicetm', 'alqth', 'alqtm', 'alqvolot', 'cntdur', 'plspnk', 'smplclth', 'smplcltm', 'smplctth', 'smplcttm', 'smplspd', 'srplcol', 'srpldn', 'srpldnsp', 'srpldt'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'cfrnd', 'cjjnd', 'cjjscr', 'cpsnd', 'cpsscr', 'crcfrscr', 'lanklnd', 'lanklscr', 'lanklwk', 'lbcpnd', 'lbcpscr', 'lbcpwk', 'lbrchnd', 'lbrchscr', 'lbrchwk', 'lbsnd', 'lbsscr', 'lcadnd', 'lcadscr', 'lcclnnd', 'lcclnscr', 'lffnd', 'lffscr', 'lhsnd', 'lhsscr', 'llclnnd', 'llclnscr', 'lptlrnd1', 'lptlrscr', 'lptlrwk', 'ltrcpnd', 'ltrcpscr', 'ltrcpwk', 'ranklnd', 'ranklscr', 'ranklwk', 'rbcpnd', 'rbcpscr', 'rbcpwk', 'rbrchnd', 'rbrchscr', 'rbrchwk', 'rbsnd', 'rbsscr', 'rcadnd', 'rcadscr', 'rcclnnd', 'rcclnscr', 'rffnd', 'rffscr', 'rflxdt', 'rflxst', 'rhsnd', 'rhsscr', 'rlclnnd', 'rlclnscr', 'rptlrnd', 'rptlrscr', 'rptlrwk', 'rtrcpnd', 'rtrcpscr', 'rtrcpwk'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'aliqcnt', 'aliqvol', 'aliqvolu', 'alqfrzna', 'alqfrzth', 'alqfrztm', 'alqiceth', 'alqicetm', 'alqth', 'alqtm', 'alqvolot', 'cntdur', 'serpnk', 'smplclth', 'smplcltm', 'smplctth', 'smplcttm', 'smplspd', 'srplcol', 'srpldn', 'srpldnsp', 'srpldt'],
-        ['Participant_ID', 'SubjectUID', 'subject_group_id'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'admsndt', 'dschgdt', 'rsnothsp', 'trachrsn', 'trchdt', 'trchrcdt'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'fvcl1', 'fvcl2', 'fvcl3', 'fvcnd2', 'fvcnd3', 'fvcndrs2', 'fvcndrs3', 'fvcndsp2', 'fvcndsp3', 'fvcp1', 'fvcp2', 'fvcp3', 'fvcvar', 'source', 'sourcesp', 'svcdn', 'svcdnsp', 'svcdt', 
-         'svcl1', 'svcl2', 'svcl3', 'svcnd2', 'svcnd3', 'svcndrs2', 'svcndrs3', 'svcndsp2', 'svcndsp3', 'svcp1', 'svcp2', 'svcp3', 'svcvar', 'vcpos', 'vctyp'],
-        ['Participant_ID', 'SubjectUID', 'Form_Name', 'Visit_Name', 'Visit_Date', 'bmi', 'bparm', 'bpdias', 'bppos', 'bpsys', 'height', 'heightu', 'hr', 'rr', 'source', 'sourcesp', 'temp', 'temprt', 'temprtsp', 'tempu', 'vsdn', 'vsdnsp', 'vsdt', 'weight', 'weightu']
-    ]
-    return headers
-
 def create_full_filepaths(filepath, initial_filenames):
     """Create full file paths for each initial file."""
     return [os.path.join(filepath, filename) for filename in initial_filenames]
 
-def rename_and_move_files(filepath, initial_filenames, curated_filenames):
+def move_file(src, dest):
+    """Move src to dest, replacing dest, also across file systems."""
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        # The destination is on another file system
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dest)
+
+def rename_and_move_files(
+    filepath, initial_filenames, curated_filenames, unchanged_filenames=(), clinical_dir=None, resumed_filenames=()
+):
     """
     Create a 'Clinical' folder, rename files, and move them into the 'Clinical' folder.
-    
-    Returns the list of new curated file paths.
+
+    Returns the list of new curated file paths and the set of curated filenames moved in this run.
     """
-    clinical_dir = os.path.join(filepath, "Clinical")
+    clinical_dir = clinical_dir or os.path.join(filepath, "Clinical")
     os.makedirs(clinical_dir, exist_ok=True)
 
     initial_filepaths = create_full_filepaths(filepath, initial_filenames)
     curated_filepaths = [os.path.join(clinical_dir, new_name) for new_name in curated_filenames]
+    moved_filenames = set()
 
-    for src, dest in zip(initial_filepaths, curated_filepaths):
+    for src, dest, new_name in zip(initial_filepaths, curated_filepaths, curated_filenames):
+        if new_name in unchanged_filenames:
+            print(f"Unchanged since last curation: {dest}. Skipping.")
+            continue
+        if new_name in resumed_filenames:
+            print(f"Resuming {dest} from the checkpoint. Skipping.")
+            continue
         try:
-            os.replace(src, dest)
+            move_file(src, dest)
+            moved_filenames.add(new_name)
             print(f"Moved and renamed: {src} -> {dest}")
         except FileNotFoundError:
             print(f"File not found: {src}. Skipping.")
         except Exception as e:
             print(f"Error moving {src} to {dest}: {e}")
 
-    return curated_filepaths
+    return curated_filepaths, moved_filenames
 
-def add_participant_id(curated_filepaths):
-    """Add 'Participant_ID' column to each curated CSV file."""
+def restore_invalid_sources(filepath, initial_filenames, curated_filepaths, results, moved_filenames):
+    """Move the exports of files that failed validation back to the input folder."""
+    # Only exports moved in this run still hold source data: a file that fails is not written
+    for initial_name, file_path, result in zip(initial_filenames, curated_filepaths, results):
+        if result['status'] != 'invalid' or os.path.basename(file_path) not in moved_filenames:
+            continue
+        if not os.path.exists(file_path):
+            continue
+        src = os.path.join(filepath, initial_name)
+        try:
+            # Never overwrite an export delivered again since the run started
+            if os.path.exists(src):
+                move_file(file_path, f"{src}.invalid")
+                print(f"Moved {file_path} to {src}.invalid: it failed validation and {src} exists.")
+            else:
+                move_file(file_path, src)
+                print(f"Moved {file_path} back to {src}: it failed validation. Fix it and run again.")
+        except Exception as e:
+            print(f"Error moving {file_path} out of the curated package: {e}")
+
+def add_participant_id(curated_filepaths, checkpoint=None):
+    """Add 'Participant_ID' column to each curated CSV file and return the per-file results."""
+    results = []
     for file_path in curated_filepaths:
+        resumed = resume_result(checkpoint, file_path, 'add_participant_id')
+        if resumed is not None:
+            results.append(resumed)
+            continue
+        metrics = clinical_Run_Report.FileMetrics()
         try:
-            df = pd.read_csv(file_path, encoding='unicode_escape')
+            df = clinical_Schema.read_clinical_csv(file_path)
+            metrics.read(len(df), os.path.getsize(file_path))
             if 'Participant_ID' not in df.columns:
                 df['Participant_ID'] = "CASE-" + df['SubjectUID'].astype(str)
-                df.to_csv(file_path, index=False)
+                write_csv_atomic(df, file_path)
+                metrics.wrote(len(df), os.path.getsize(file_path))
                 print(f"Added 'Participant_ID' to {file_path}")
             else:
                 print(f"'Participant_ID' already exists in {file_path}. Skipping.")
+            results.append(checkpoint_result(
+                checkpoint, 'add_participant_id', clinical_Run_Report.file_result(file_path, metrics)
+            ))
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
+            results.append(clinical_Run_Report.file_result(file_path, metrics, e))
+    return results
 
-def reorder_columns(curated_filepaths, headers):
-    """Reorder columns in each CSV file based on the provided headers."""
+def reorder_columns(curated_filepaths, headers, checkpoint=None):
+    """Reorder columns in each CSV file based on the provided headers and return the per-file results."""
+    results = []
     for file_path, desired_headers in zip(curated_filepaths, headers):
+        resumed = resume_result(checkpoint, file_path, 'reorder_columns')
+        if resumed is not None:
+            results.append(resumed)
+            continue
+        metrics = clinical_Run_Report.FileMetrics()
         try:
-            df = pd.read_csv(file_path, encoding='unicode_escape')
+            df = clinical_Schema.read_clinical_csv(file_path)
+            metrics.read(len(df), os.path.getsize(file_path))
             # Check if all desired headers are present in the DataFrame
             missing_columns = set(desired_headers) - set(df.columns)
             if missing_columns:
@@ -149,31 +166,52 @@ def reorder_columns(curated_filepaths, headers):
                 for col in missing_columns:
                     df[col] = np.nan
             df_reordered = df[desired_headers]
-            df_reordered.to_csv(file_path, index=False)
+            write_csv_atomic(df_reordered, file_path)
+            metrics.wrote(len(df_reordered), os.path.getsize(file_path))
             print(f"Reordered columns in {file_path}")
+            results.append(checkpoint_result(
+                checkpoint, 'reorder_columns', clinical_Run_Report.file_result(file_path, metrics)
+            ))
         except Exception as e:
             print(f"Error reordering columns in {file_path}: {e}")
+            results.append(clinical_Run_Report.file_result(file_path, metrics, e))
+    return results
 
-def clean_nan_values(curated_filepaths):
-    """Replace '.' with empty strings in each CSV file."""
+def clean_nan_values(curated_filepaths, checkpoint=None):
+    """Replace '.' with empty strings in each CSV file and return the per-file results."""
+    results = []
     for file_path in curated_filepaths:
+        resumed = resume_result(checkpoint, file_path, 'clean_nan_values')
+        if resumed is not None:
+            results.append(resumed)
+            continue
+        metrics = clinical_Run_Report.FileMetrics()
         try:
-            df = pd.read_csv(file_path, encoding='unicode_escape')
+            df = clinical_Schema.read_clinical_csv(file_path)
+            metrics.read(len(df), os.path.getsize(file_path))
             df.replace(to_replace=".", value="", inplace=True)
-            df.to_csv(file_path, index=False)
+            write_csv_atomic(df, file_path)
+            metrics.wrote(len(df), os.path.getsize(file_path))
             print(f"Cleaned NaN values in {file_path}")
+            results.append(checkpoint_result(
+                checkpoint, 'clean_nan_values', clinical_Run_Report.file_result(file_path, metrics)
+            ))
         except Exception as e:
             print(f"Error cleaning NaN values in {file_path}: {e}")
+            results.append(clinical_Run_Report.file_result(file_path, metrics, e))
+    return results
 
-def update_participant_ids(curated_filepaths):
+def update_participant_ids(curated_filepaths, checkpoint=None, index_path=None):
     """
-    Update 'Participant_ID' for control participants.
+    Update 'Participant_ID' for control participants and return the per-file results.
     Controls are identified in 'subjects.csv' where 'subject_group_id' == 5.
+    With index_path, every file written is recorded in the subject index.
     """
+    results = []
     subjects_file = curated_filepaths[30]  # Assuming 'subjects.csv' is at index 30
     try:
-        subjects_df = pd.read_csv(subjects_file, encoding='unicode_escape')
-        controls_df = subjects_df[subjects_df['subject_group_id'] == 5]
+        subjects_df = clinical_Schema.read_clinical_csv(subjects_file)
+        controls_df = subjects_df[pd.to_numeric(subjects_df['subject_group_id'], errors='coerce') == 5]
         ctrl_uid_list = controls_df['SubjectUID'].astype(str).tolist()
         print(f"Identified {len(ctrl_uid_list)} control participants.")
 
@@ -182,49 +220,1095 @@ def update_participant_ids(curated_filepaths):
 
         # Apply replacement across all files
         for file_path in curated_filepaths:
+            resumed = resume_result(checkpoint, file_path, 'update_participant_ids')
+            if resumed is not None:
+                results.append(resumed)
+                continue
+            metrics = clinical_Run_Report.FileMetrics()
             try:
-                df = pd.read_csv(file_path, encoding='unicode_escape')
+                df = clinical_Schema.read_clinical_csv(file_path)
+                metrics.read(len(df), os.path.getsize(file_path))
                 if 'Participant_ID' in df.columns:
-                    df['Participant_ID'] = df['Participant_ID'].replace(replacement_dict)
-                    df.to_csv(file_path, index=False)
+                    df['Participant_ID'] = replace_participant_ids(df['Participant_ID'], replacement_dict)
+                    index_writer = open_index_writer(index_path, file_path)
+                    try:
+                        write_csv_atomic(df, file_path, index_writer)
+                    except Exception:
+                        abort_index_writer(index_writer)
+                        raise
+                    metrics.wrote(len(df), os.path.getsize(file_path))
                     print(f"Updated 'Participant_ID' in {file_path}")
+                    close_index_writer(index_writer)
+                results.append(checkpoint_result(
+                    checkpoint, 'update_participant_ids', clinical_Run_Report.file_result(file_path, metrics)
+                ))
             except Exception as e:
                 print(f"Error updating 'Participant_ID' in {file_path}: {e}")
+                results.append(clinical_Run_Report.file_result(file_path, metrics, e))
+
+    except FileNotFoundError as e:
+        print(f"'subjects.csv' not found at {subjects_file}. Cannot update 'Participant_ID' for controls.")
+        results.append(clinical_Run_Report.file_result(subjects_file, clinical_Run_Report.FileMetrics(), e))
+    except Exception as e:
+        print(f"Error processing 'subjects.csv': {e}")
+        results.append(clinical_Run_Report.file_result(subjects_file, clinical_Run_Report.FileMetrics(), e))
+    return results
+
+def open_index_writer(index_path, file_path):
+    """Return a clinical_Subject_Index.TableIndexWriter for file_path, or None without an index."""
+    if index_path is None:
+        return None
+    return clinical_Subject_Index.TableIndexWriter(index_path, file_path)
+
+def close_index_writer(index_writer):
+    if index_writer is not None:
+        index_writer.close()
+
+def abort_index_writer(index_writer):
+    if index_writer is not None:
+        index_writer.abort()
+
+def write_csv_chunk(f, df, header=True, first_row=0, index_writer=None):
+    """
+    Write a DataFrame as CSV to a file open in binary mode, CSV_WRITE_ROWS rows at a time.
+    The index records of the rows, numbered from first_row, go to index_writer, if given.
+    """
+    for start in range(0, max(len(df), 1), CSV_WRITE_ROWS):
+        rows = df.iloc[start:start + CSV_WRITE_ROWS]
+        with_header = header and start == 0
+        data = rows.to_csv(index=False, header=with_header).encode(clinical_Schema.CURATED_ENCODING)
+        offset = f.tell()
+        f.write(data)
+        if index_writer is not None:
+            offsets, lengths = clinical_Subject_Index.record_spans(data)
+            if with_header:
+                offsets, lengths = offsets[1:], lengths[1:]
+            index_writer.write(
+                clinical_Subject_Index.index_records(rows, offsets + offset, lengths, first_row + start)
+            )
+
+def write_csv_atomic(df, file_path, index_writer=None):
+    """Write a DataFrame to CSV under a temporary name and move it over file_path."""
+    temp_path = f"{file_path}.part"
+    try:
+        with open(temp_path, 'wb') as f:
+            write_csv_chunk(f, df, index_writer=index_writer)
+        # A run killed mid-write leaves the previous file or the new one, never a truncated file
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class CurationCheckpoint:
+    """Per-file results of the stages completed by the current run, saved so an interrupted run can be resumed."""
+
+    def __init__(self, clinical_dir, options, files=None, sources=None, moved=None):
+        self.path = os.path.join(clinical_dir, CHECKPOINT_FILENAME)
+        self.options = options
+        self.files = files or {}
+        self.sources = sources or {}
+        self.moved = moved or []
+
+    @classmethod
+    def load(cls, clinical_dir, options):
+        """Return the checkpoint of an interrupted run with the same options, or an empty one."""
+        checkpoint = cls(clinical_dir, options)
+        try:
+            with open(checkpoint.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            print("No checkpoint of an interrupted run was found. Every file will be curated.")
+            return checkpoint
+        except Exception as e:
+            print(f"Warning: Could not read {checkpoint.path} ({e}). Every file will be curated.")
+            return checkpoint
+        if saved.get('options') != options:
+            print(f"Warning: {checkpoint.path} was left by a run with other options. Every file will be curated.")
+            return checkpoint
+        checkpoint.files = saved.get('files', {})
+        checkpoint.sources = saved.get('sources', {})
+        checkpoint.moved = saved.get('moved', [])
+        print(f"Resuming from {checkpoint.path}: {len(checkpoint.files)} files already have completed stages.")
+        return checkpoint
+
+    def is_done(self, file_path, stage):
+        return stage in self.files.get(os.path.basename(file_path), {})
+
+    def result(self, file_path, stage):
+        """Return the saved result of a completed stage, with this run's (empty) metrics."""
+        saved = self.files[os.path.basename(file_path)][stage]
+        return {**saved, **clinical_Run_Report.FileMetrics().finish(), 'resumed': True}
+
+    def mark_done(self, file_path, stage, result):
+        self.files.setdefault(os.path.basename(file_path), {})[stage] = result
+        self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.part"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'options': self.options, 'files': self.files, 'sources': self.sources, 'moved': self.moved},
+                f, indent=2, sort_keys=True
+            )
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def resume_result(checkpoint, file_path, stage, log=print):
+    """Return the saved result of a file that completed stage before the run was interrupted, or None."""
+    if checkpoint is None or not checkpoint.is_done(file_path, stage):
+        return None
+    log(f"'{stage}' already completed for {file_path} before the interruption. Skipping.")
+    return checkpoint.result(file_path, stage)
+
+def checkpoint_result(checkpoint, stage, result):
+    """Record a file's result for stage in the checkpoint, if any, when it succeeded; return the result."""
+    if checkpoint is not None and result['status'] in ('ok', 'remapped'):
+        checkpoint.mark_done(result['file_path'], stage, result)
+    return result
+
+def file_sha256(file_path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
+def source_fingerprint(file_path, block_size=1024 * 1024):
+    """Return the SHA-256, size and encoding of a NeuroBANK export, all from one read."""
+    digest = hashlib.sha256()
+    detector = clinical_Schema.EncodingDetector()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+            detector.update(block)
+    return {
+        'source_sha256': digest.hexdigest(), 'source_size': os.path.getsize(file_path),
+        'source_encoding': detector.finish(),
+    }
+
+def headers_sha256(desired_headers):
+    """Return a digest of a curated file's header list and column dtypes, so changes to either force re-curation."""
+    columns = [[column, clinical_Schema.column_kind(column)] for column in desired_headers]
+    return hashlib.sha256(json.dumps(columns).encode('utf-8')).hexdigest()
+
+def load_manifest(clinical_dir):
+    """Load the curation manifest from the 'Clinical' folder, or return an empty one."""
+    manifest_path = os.path.join(clinical_dir, MANIFEST_FILENAME)
+    empty_manifest = {'subjects_sha256': None, 'control_uids': None, 'files': {}}
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest.setdefault('files', {})
+        return manifest
     except FileNotFoundError:
+        return empty_manifest
+    except Exception as e:
+        print(f"Warning: Could not read {manifest_path} ({e}). Every file will be curated.")
+        return empty_manifest
+
+def save_manifest(clinical_dir, manifest):
+    """Write the curation manifest into the 'Clinical' folder."""
+    manifest_path = os.path.join(clinical_dir, MANIFEST_FILENAME)
+    temp_path = f"{manifest_path}.part"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+    print(f"Wrote curation manifest {manifest_path}")
+
+def output_is_current(entry, dest, output_formats):
+    """Return True if a curated file (and its columnar outputs) still match its manifest entry."""
+    if not os.path.exists(dest) or not set(output_formats) <= set(entry.get('output_formats', ())):
+        return False
+    if any(not os.path.exists(columnar_output_path(dest, f)) for f in output_formats if f != 'csv'):
+        return False
+    return (
+        os.path.getsize(dest) == entry.get('output_size')
+        and file_sha256(dest) == entry.get('output_sha256')
+    )
+
+def plan_incremental_curation(
+    filepath, initial_filenames, curated_filenames, headers, manifest, output_formats, clinical_dir=None
+):
+    """
+    Compare the NeuroBANK exports with the manifest of the previous run.
+
+    Returns the set of unchanged curated filenames and the hash, size and encoding of every source present.
+    """
+    clinical_dir = clinical_dir or os.path.join(filepath, "Clinical")
+    unchanged, sources = set(), {}
+    for initial_name, curated_name, desired_headers in zip(initial_filenames, curated_filenames, headers):
+        src = os.path.join(filepath, initial_name)
+        dest = os.path.join(clinical_dir, curated_name)
+        if os.path.exists(src):
+            sources[curated_name] = source_fingerprint(src)
+        entry = manifest['files'].get(curated_name)
+        if entry is None or entry.get('headers_sha256') != headers_sha256(desired_headers):
+            continue
+        source = sources.get(curated_name)
+        if source is not None and (
+            source['source_sha256'] != entry.get('source_sha256')
+            or source['source_size'] != entry.get('source_size')
+        ):
+            continue
+        if output_is_current(entry, dest, output_formats):
+            unchanged.add(curated_name)
+    return unchanged, sources
+
+def update_manifest(manifest, results, curated_filenames, headers, sources, output_formats):
+    """
+    Record the source and output hashes of this run's results in the manifest.
+    Files curated without the control map of 'subjects.csv' are left out, so they are curated again.
+    """
+    control_map_known = any(result.get('control_uids') is not None for result in results)
+    for result, curated_name, desired_headers in zip(results, curated_filenames, headers):
+        if result['status'] not in ('ok', 'remapped', 'skipped') or (
+            result['status'] == 'ok' and not control_map_known
+        ):
+            manifest['files'].pop(curated_name, None)
+            continue
+        entry = manifest['files'].setdefault(curated_name, {})
+        if result['status'] == 'ok':
+            entry.update(sources.get(curated_name, {'source_sha256': None, 'source_size': None, 'source_encoding': None}))
+            entry['headers_sha256'] = headers_sha256(desired_headers)
+            entry['output_formats'] = sorted(output_formats)
+        if 'output_sha256' in result:
+            entry['output_sha256'] = result['output_sha256']
+            entry['output_size'] = result['output_size']
+        if result.get('control_uids') is not None:
+            manifest['subjects_sha256'] = entry.get('source_sha256')
+            manifest['control_uids'] = result['control_uids']
+    return manifest
+
+def curated_output_size(file_path, output_formats=('csv',)):
+    """Return the total size in bytes of a curated CSV and its columnar outputs."""
+    columnar_paths = [columnar_output_path(file_path, f) for f in output_formats if f != 'csv']
+    return clinical_Run_Report.file_size(file_path, *columnar_paths)
+
+def output_fingerprint(file_path):
+    """Return the output hash and size recorded in the manifest for a curated file."""
+    return {'output_sha256': file_sha256(file_path), 'output_size': os.path.getsize(file_path)}
+
+def find_subjects_filepath(curated_filepaths):
+    """Return the path of 'subjects.csv' among the curated file paths, or None."""
+    for file_path in curated_filepaths:
+        if os.path.basename(file_path) == 'subjects.csv':
+            return file_path
+    return None
+
+def build_control_replacements(subjects_df):
+    """
+    Build the 'CASE-uid' -> 'CTRL-uid' mapping from a subjects DataFrame.
+    Controls are identified where 'subject_group_id' == 5.
+    """
+    controls_df = subjects_df[pd.to_numeric(subjects_df['subject_group_id'], errors='coerce') == 5]
+    ctrl_uid_list = controls_df['SubjectUID'].astype(str).tolist()
+    return {f"CASE-{uid}": f"CTRL-{uid}" for uid in ctrl_uid_list}
+
+def replace_participant_ids(participant_ids, replacement_dict):
+    """Return participant_ids with every value found in replacement_dict replaced."""
+    return participant_ids.map(replacement_dict).fillna(participant_ids)
+
+def clean_sentinel_columns(df):
+    """Replace '.' with empty values, leaving column dtypes as they are."""
+    updates = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            continue
+        sentinel_mask = df[col] == "."
+        if sentinel_mask.any():
+            updates[col] = df[col].mask(sentinel_mask)
+    return df.assign(**updates) if updates else df
+
+def curate_dataframe(df, desired_headers, file_path, replacement_dict=None, log=print):
+    """
+    Apply every curation transform to an in-memory DataFrame:
+    'Participant_ID' prefix, column reorder, '.' cleaning and CASE/CTRL remap.
+    """
+    # 'Participant_ID' column
+    if 'Participant_ID' not in df.columns:
+        try:
+            # Appended with concat rather than inserted: wide chunks are often fragmented
+            participant_ids = ("CASE-" + df['SubjectUID'].astype(str)).rename('Participant_ID')
+            df = pd.concat([df, participant_ids], axis=1)
+            log(f"Added 'Participant_ID' to {file_path}")
+        except Exception as e:
+            log(f"Error processing {file_path}: {e}")
+    else:
+        # Curated before: start again from 'CASE-' so the current controls decide the prefix
+        subject_uids = df['SubjectUID'].astype(str)
+        was_control = (df['Participant_ID'] == "CTRL-" + subject_uids).fillna(False).astype(bool)
+        if was_control.any():
+            df = df.assign(Participant_ID=df['Participant_ID'].mask(was_control, "CASE-" + subject_uids))
+            log(f"'Participant_ID' already exists in {file_path}. Reset {int(was_control.sum())} control prefixes.")
+        else:
+            log(f"'Participant_ID' already exists in {file_path}. Skipping.")
+
+    # Column order
+    missing_columns = set(desired_headers) - set(df.columns)
+    if missing_columns:
+        log(f"Warning: Missing columns {missing_columns} in {file_path}. They will be filled with NaN.")
+    # One reindex adds the missing columns, instead of inserting them one at a time
+    df = df.reindex(columns=desired_headers)
+    log(f"Reordered columns in {file_path}")
+
+    # '.' values
+    df = clean_sentinel_columns(df)
+    log(f"Cleaned NaN values in {file_path}")
+
+    # Controls
+    if replacement_dict:
+        df['Participant_ID'] = replace_participant_ids(df['Participant_ID'], replacement_dict)
+        log(f"Updated 'Participant_ID' in {file_path}")
+
+    return df
+
+def columnar_output_path(file_path, output_format):
+    """Return the Parquet/Arrow path written next to a curated CSV file."""
+    return os.path.splitext(file_path)[0] + COLUMNAR_EXTENSIONS[output_format]
+
+class ColumnarTableWriter:
+    """
+    Write one curated table to Parquet or Arrow IPC with the registry schema, whole or chunk by chunk.
+    Values that do not parse as their column's type are kept as text in '<column>_raw'.
+    """
+
+    def __init__(self, file_path, output_format):
+        self.path = columnar_output_path(file_path, output_format)
+        self.temp_path = f"{self.path}.part"
+        self.output_format = output_format
+        self.dtypes = None
+        self.schema = None
+        self.writer = None
+        self.unparsed = {}
+
+    def write(self, df):
+        import pyarrow as pa
+
+        if self.writer is None:
+            self.dtypes = clinical_Schema.columnar_dtypes(df.columns)
+            self.schema = pa.Schema.from_pandas(
+                pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in self.dtypes.items()}),
+                preserve_index=False
+            )
+            if self.output_format == 'parquet':
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.temp_path, self.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.temp_path, self.schema)
+        typed = clinical_Schema.to_columnar(df, self.unparsed)
+        self.writer.write_table(pa.Table.from_pandas(typed, schema=self.schema, preserve_index=False))
+
+    def report(self, log=print):
+        """Log the values kept only as text because they do not parse as their registry type."""
+        for column, count in self.unparsed.items():
+            log(
+                f"Kept {count} '{column}' values that do not parse as {self.dtypes[column]} as text in "
+                f"'{column}{clinical_Schema.RAW_SUFFIX}' in {self.path}"
+            )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+def write_curated_outputs(df, file_path, output_formats=('csv',), log=print, index_writer=None):
+    """
+    Write a curated DataFrame to its CSV path and to every requested columnar format.
+    The index records of the CSV rows go to index_writer, if given.
+    """
+    write_csv_atomic(df, file_path, index_writer)
+    for output_format in output_formats:
+        if output_format == 'csv':
+            continue
+        writer = ColumnarTableWriter(file_path, output_format)
+        try:
+            writer.write(df)
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        log(f"Wrote {output_format} output {writer.path}")
+        writer.report(log)
+
+def curate_subjects_file(
+    subjects_file, desired_headers, output_formats=('csv',), index_path=None, encoding=None, validate=False
+):
+    """
+    Curate 'subjects.csv' in a single pass.
+
+    Returns the control replacement mapping, the SubjectUID to group mapping and the per-file result.
+    """
+    metrics = clinical_Run_Report.FileMetrics()
+    try:
+        subjects_df = clinical_Schema.read_clinical_csv(subjects_file, desired_headers, encoding=encoding)
+        metrics.read(len(subjects_df), os.path.getsize(subjects_file))
+    except FileNotFoundError as e:
         print(f"'subjects.csv' not found at {subjects_file}. Cannot update 'Participant_ID' for controls.")
+        return {}, {}, clinical_Run_Report.file_result(subjects_file, metrics, e)
     except Exception as e:
         print(f"Error processing 'subjects.csv': {e}")
+        return {}, {}, clinical_Run_Report.file_result(subjects_file, metrics, e)
 
-def main():
-    """Main function to orchestrate the data curation process."""
+    try:
+        subjects_df = curate_dataframe(subjects_df, desired_headers, subjects_file)
+        replacement_dict = build_control_replacements(subjects_df)
+        print(f"Identified {len(replacement_dict)} control participants.")
+        if replacement_dict:
+            subjects_df['Participant_ID'] = replace_participant_ids(subjects_df['Participant_ID'], replacement_dict)
+            print(f"Updated 'Participant_ID' in {subjects_file}")
+        control_uids = sorted(key[len("CASE-"):] for key in replacement_dict)
+        uid_to_group = clinical_Package_Validation.build_uid_to_group(subjects_df)
+        validator = None
+        if validate:
+            validator = clinical_Package_Validation.FileValidator(subjects_file, uid_to_group, desired_headers)
+            validator.check(subjects_df)
+            validator.report()
+            if not validator.passes(BLOCKING_RULES):
+                print(f"Did not write curated file {subjects_file}: it failed validation.")
+                return replacement_dict, uid_to_group, invalid_result(subjects_file, metrics, validator)
+        index_writer = open_index_writer(index_path, subjects_file)
+        try:
+            write_curated_outputs(subjects_df, subjects_file, output_formats, index_writer=index_writer)
+        except Exception:
+            abort_index_writer(index_writer)
+            raise
+        metrics.wrote(len(subjects_df), curated_output_size(subjects_file, output_formats))
+        print(f"Wrote curated file {subjects_file}")
+        close_index_writer(index_writer)
+        return replacement_dict, uid_to_group, {
+            **clinical_Run_Report.file_result(subjects_file, metrics),
+            'control_uids': control_uids, **output_fingerprint(subjects_file), **validation_issues(validator)
+        }
+    except Exception as e:
+        print(f"Error processing 'subjects.csv': {e}")
+        return {}, {}, clinical_Run_Report.file_result(subjects_file, metrics, e)
+
+def curate_file_chunked(
+    file_path, desired_headers, replacement_dict, chunksize, log=print, output_formats=('csv',), validator=None,
+    encoding=None, index_writer=None
+):
+    """Streaming variant of curate_file; returns the number of rows curated."""
+    temp_path = f"{file_path}.part"
+    reader = clinical_Schema.read_clinical_csv(file_path, desired_headers, encoding=encoding, chunksize=chunksize)
+    columnar_writers = [
+        ColumnarTableWriter(file_path, output_format)
+        for output_format in output_formats if output_format != 'csv'
+    ]
+
+    def discard_outputs():
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        for writer in columnar_writers:
+            writer.abort()
+
+    rows_written = 0
+    chunk_count = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in reader:
+                # Every chunk logs the same transform messages, so only the first one's are kept
+                chunk_log = log if chunk_count == 0 else (lambda message: None)
+                chunk = curate_dataframe(chunk, desired_headers, file_path, replacement_dict, chunk_log)
+                if validator is not None:
+                    validator.check(chunk)
+                write_csv_chunk(f, chunk, header=chunk_count == 0, first_row=rows_written, index_writer=index_writer)
+                for writer in columnar_writers:
+                    writer.write(chunk)
+                rows_written += len(chunk)
+                chunk_count += 1
+        # The export is left in place when the file fails a blocking rule
+        if validator is not None and not validator.passes(BLOCKING_RULES):
+            discard_outputs()
+            return rows_written
+        os.replace(temp_path, file_path)
+        for writer in columnar_writers:
+            writer.close()
+            log(f"Wrote {writer.output_format} output {writer.path}")
+            writer.report(log)
+    except Exception:
+        discard_outputs()
+        raise
+    log(f"Streamed {rows_written} rows in {chunk_count} chunks of up to {chunksize} rows through {file_path}")
+    return rows_written
+
+def curate_file(
+    file_path, desired_headers, replacement_dict, log=print, chunksize=None, max_memory_mb=None,
+    output_formats=('csv',), uid_to_group=None, index_path=None, encoding=None
+):
+    """
+    Read one curated CSV file, apply every curation transform and write it back once.
+
+    Returns a dict with the file path, its status, the error message, if any, and the run report metrics.
+    """
+    metrics = clinical_Run_Report.FileMetrics()
+    validator = None
+    if uid_to_group is not None:
+        validator = clinical_Package_Validation.FileValidator(file_path, uid_to_group, desired_headers)
+    index_writer = None
+    try:
+        index_writer = open_index_writer(index_path, file_path)
+        encoding = encoding or clinical_Schema.detect_encoding(file_path)
+        if encoding != clinical_Schema.CURATED_ENCODING:
+            log(f"Decoding {file_path} as {encoding}")
+        if chunksize is None and max_memory_mb is not None:
+            chunksize = clinical_Schema.estimate_chunksize(file_path, max_memory_mb, desired_headers, encoding)
+        source_size = os.path.getsize(file_path)
+        if chunksize is None:
+            df = clinical_Schema.read_clinical_csv(file_path, desired_headers, encoding=encoding)
+            metrics.read(len(df), source_size)
+            df = curate_dataframe(df, desired_headers, file_path, replacement_dict, log)
+            if validator is not None:
+                validator.check(df)
+            if validator is None or validator.passes(BLOCKING_RULES):
+                write_curated_outputs(df, file_path, output_formats, log=log, index_writer=index_writer)
+            rows_written = len(df)
+        else:
+            rows_written = curate_file_chunked(
+                file_path, desired_headers, replacement_dict, chunksize, log, output_formats, validator, encoding,
+                index_writer
+            )
+            metrics.read(rows_written, source_size)
+        if validator is not None:
+            validator.report(log)
+            if not validator.passes(BLOCKING_RULES):
+                abort_index_writer(index_writer)
+                log(f"Did not write curated file {file_path}: it failed validation.")
+                return invalid_result(file_path, metrics, validator)
+        metrics.wrote(rows_written, curated_output_size(file_path, output_formats))
+        log(f"Wrote curated file {file_path}")
+        close_index_writer(index_writer)
+        return {
+            **clinical_Run_Report.file_result(file_path, metrics), **output_fingerprint(file_path),
+            **validation_issues(validator)
+        }
+    except Exception as e:
+        abort_index_writer(index_writer)
+        log(f"Error curating {file_path}: {e}")
+        return clinical_Run_Report.file_result(file_path, metrics, e)
+
+def invalid_result(file_path, metrics, validator):
+    """Return the per-file result of a file whose curated data failed validation."""
+    return {
+        **clinical_Run_Report.file_result(file_path, metrics), 'status': 'invalid',
+        'error': f"{validator.issue_count} validation issues", 'issues': validator.issue_counts
+    }
+
+def validation_issues(validator):
+    """Return the issue counts to add to the result of a file written with data-quality issues, if any."""
+    if validator is None or validator.passed:
+        return {}
+    return {'issues': validator.issue_counts}
+
+def build_control_delta(previous_control_uids, control_uids):
+    """
+    Return the Participant_ID rewrites needed when the set of control UIDs changes:
+    'CASE-uid' -> 'CTRL-uid' for new controls and 'CTRL-uid' -> 'CASE-uid' for removed ones.
+    """
+    previous, current = set(previous_control_uids), set(control_uids)
+    remap_dict = {f"CASE-{uid}": f"CTRL-{uid}" for uid in current - previous}
+    remap_dict.update({f"CTRL-{uid}": f"CASE-{uid}" for uid in previous - current})
+    return remap_dict
+
+def remap_columnar_output(file_path, output_format, remap_dict):
+    """Apply a Participant_ID remap to the Parquet/Arrow output written next to a curated CSV."""
+    import pyarrow as pa
+
+    path = columnar_output_path(file_path, output_format)
+    temp_path = f"{path}.part"
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    column_index = table.schema.get_field_index('Participant_ID')
+    participant_ids = replace_participant_ids(table.column(column_index).to_pandas(), remap_dict)
+    table = table.set_column(
+        column_index, table.schema.field(column_index),
+        pa.array(participant_ids, type=table.schema.field(column_index).type)
+    )
+    if output_format == 'parquet':
+        pq.write_table(table, temp_path)
+    else:
+        with pa.ipc.new_file(temp_path, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, path)
+
+def remap_participant_ids(
+    file_path, remap_dict, log=print, output_formats=('csv',), chunksize=None, uid_to_group=None, index_path=None,
+    desired_headers=None
+):
+    """Rewrite only the Participant_IDs affected by a change in the set of controls."""
+    temp_path = f"{file_path}.part"
+    metrics = clinical_Run_Report.FileMetrics()
+    validator = None
+    if uid_to_group is not None:
+        validator = clinical_Package_Validation.FileValidator(file_path, uid_to_group, desired_headers)
+    index_writer = None
+    try:
+        index_writer = open_index_writer(index_path, file_path)
+        metrics.read(0, os.path.getsize(file_path))
+        # Read as plain text so every other value is written back exactly as it was
+        reader = pd.read_csv(
+            file_path, encoding=clinical_Schema.CURATED_ENCODING, dtype=str, keep_default_na=False,
+            chunksize=chunksize or REMAP_CHUNKSIZE
+        )
+        changed_rows = 0
+        with open(temp_path, 'wb') as f:
+            for chunk_number, chunk in enumerate(reader):
+                if 'Participant_ID' in chunk.columns:
+                    updated = replace_participant_ids(chunk['Participant_ID'], remap_dict)
+                    changed_rows += int((updated != chunk['Participant_ID']).sum())
+                    chunk['Participant_ID'] = updated
+                if validator is not None:
+                    # Blank values are missing values here, as when the validator reads the file
+                    validator.check(chunk.mask(chunk == ''))
+                write_csv_chunk(
+                    f, chunk, header=chunk_number == 0, first_row=metrics.rows_read, index_writer=index_writer
+                )
+                metrics.read(len(chunk))
+        if validator is not None:
+            validator.report(log)
+            if not validator.passes(BLOCKING_RULES):
+                os.remove(temp_path)
+                abort_index_writer(index_writer)
+                log(f"Did not update 'Participant_ID' in {file_path}: it failed validation.")
+                return invalid_result(file_path, metrics, validator)
+        if changed_rows == 0:
+            os.remove(temp_path)
+            abort_index_writer(index_writer)
+            log(f"No control changes affect {file_path}. Skipping.")
+            return {
+                **clinical_Run_Report.file_result(file_path, metrics), 'status': 'skipped',
+                **validation_issues(validator)
+            }
+        os.replace(temp_path, file_path)
+        for output_format in output_formats:
+            if output_format != 'csv':
+                remap_columnar_output(file_path, output_format, remap_dict)
+        close_index_writer(index_writer)
+        metrics.wrote(metrics.rows_read, curated_output_size(file_path, output_formats))
+        log(f"Updated {changed_rows} 'Participant_ID' values for changed controls in {file_path}")
+        return {
+            **clinical_Run_Report.file_result(file_path, metrics), 'status': 'remapped',
+            **output_fingerprint(file_path), **validation_issues(validator)
+        }
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        abort_index_writer(index_writer)
+        log(f"Error updating 'Participant_ID' in {file_path}: {e}")
+        return clinical_Run_Report.file_result(file_path, metrics, e)
+
+def validate_unchanged_file(result, uid_to_group, desired_headers, chunksize=None):
+    """
+    Validate a file that was not curated in this run from disk, marking its result
+    'invalid' if it fails one of BLOCKING_RULES and recording any other issues.
+    """
+    validator = clinical_Package_Validation.validate_file(
+        result['file_path'], uid_to_group, desired_headers, chunksize=chunksize
+    )
+    if validator is None:
+        result.update(status='invalid', error="validation failed")
+    elif not validator.passes(BLOCKING_RULES):
+        result.update(status='invalid', error=f"{validator.issue_count} validation issues", issues=validator.issue_counts)
+    else:
+        result.update(validation_issues(validator))
+
+def _run_file_task(function, args, kwargs):
+    """Process pool entry point: run one per-file task and return its result with the buffered log lines."""
+    messages = []
+    result = function(*args, log=messages.append, **kwargs)
+    return result, messages
+
+def curate_files_single_pass(
+    curated_filepaths, headers, workers=1, chunksize=None, max_memory_mb=None,
+    output_formats=('csv',), unchanged_filepaths=(), previous_control_uids=None, validate=False,
+    checkpoint=None, index_path=None, source_encodings=None
+):
+    """
+    Curate every file with one read and one write per file, 'subjects.csv' first.
+
+    Returns the per-file results in the same order as curated_filepaths.
+    """
+    source_encodings = source_encodings or {}
+    subjects_file = find_subjects_filepath(curated_filepaths)
+    replacement_dict = {}
+    uid_to_group = {}
+    subjects_result = None
+    subjects_resumed = None
+    if subjects_file is not None:
+        subjects_headers = headers[curated_filepaths.index(subjects_file)]
+        subjects_resumed = resume_result(checkpoint, subjects_file, SINGLE_PASS_STAGE)
+    if subjects_file is None:
+        print("'subjects.csv' is not among the curated files. Cannot update 'Participant_ID' for controls.")
+    elif subjects_resumed is not None:
+        replacement_dict = {f"CASE-{uid}": f"CTRL-{uid}" for uid in subjects_resumed['control_uids']}
+        print(f"Identified {len(replacement_dict)} control participants before the interruption.")
+        subjects_result = subjects_resumed
+        if validate:
+            uid_to_group = clinical_Package_Validation.load_subjects(subjects_file)
+    elif subjects_file in unchanged_filepaths and previous_control_uids is not None:
+        replacement_dict = {f"CASE-{uid}": f"CTRL-{uid}" for uid in previous_control_uids}
+        print(f"Identified {len(replacement_dict)} control participants from the previous run.")
+        subjects_result = {'file_path': subjects_file, 'status': 'skipped', 'error': None}
+        if validate:
+            uid_to_group = clinical_Package_Validation.load_subjects(subjects_file)
+    else:
+        replacement_dict, uid_to_group, subjects_result = curate_subjects_file(
+            subjects_file, subjects_headers, output_formats, index_path, source_encodings.get(subjects_file),
+            validate
+        )
+        checkpoint_result(checkpoint, SINGLE_PASS_STAGE, subjects_result)
+
+    control_uids = [key[len("CASE-"):] for key in replacement_dict]
+    remap_dict = {}
+    subjects_ok = subjects_result is not None and subjects_result['status'] in ('ok', 'skipped')
+    if previous_control_uids is not None and subjects_ok:
+        remap_dict = build_control_delta(previous_control_uids, control_uids)
+        if remap_dict:
+            print(f"Control participants changed since the last run: {len(remap_dict)} Participant_IDs to update.")
+    subjects_on_disk = subjects_resumed is not None or (subjects_ok and subjects_result['status'] == 'skipped')
+    if validate and uid_to_group and subjects_on_disk:
+        # Not curated in this run, so checked from disk like the other unchanged files
+        validate_unchanged_file(subjects_result, uid_to_group, subjects_headers, chunksize)
+    
+    # Files curated without the control map must not be resumed as done
+    file_checkpoint = checkpoint if subjects_ok else None
+
+    validation_groups = None
+    if validate and uid_to_group:
+        validation_groups = uid_to_group
+    elif validate:
+        print("Error: Unable to validate the curated files without SubjectUID to Group mapping.")
+
+    tasks = []
+    skipped = {}
+    for file_path, desired_headers in zip(curated_filepaths, headers):
+        if file_path == subjects_file:
+            continue
+        resumed = resume_result(checkpoint, file_path, SINGLE_PASS_STAGE)
+        if resumed is None and file_path in unchanged_filepaths and remap_dict:
+            tasks.append((file_path, remap_participant_ids, (file_path, remap_dict), {
+                'output_formats': output_formats, 'chunksize': chunksize, 'uid_to_group': validation_groups,
+                'index_path': index_path, 'desired_headers': desired_headers
+            }))
+            continue
+        if resumed is not None or file_path in unchanged_filepaths:
+            skipped[file_path] = resumed or {'file_path': file_path, 'status': 'skipped', 'error': None}
+            if validation_groups is not None:
+                validate_unchanged_file(skipped[file_path], validation_groups, desired_headers, chunksize)
+            continue
+        tasks.append((file_path, curate_file, (file_path, desired_headers, replacement_dict), {
+            'chunksize': chunksize, 'max_memory_mb': max_memory_mb, 'output_formats': output_formats,
+            'uid_to_group': validation_groups, 'index_path': index_path,
+            'encoding': source_encodings.get(file_path)
+        }))
+
+    task_results = {}
+    if workers > 1 and len(tasks) > 1:
+        print(f"Curating {len(tasks)} files on {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_file_task, function, args, kwargs)
+                for _, function, args, kwargs in tasks
+            ]
+            for (file_path, _, _, _), future in zip(tasks, futures):
+                try:
+                    result, messages = future.result()
+                except Exception as e:
+                    result, messages = (
+                        {'file_path': file_path, 'status': 'error', 'error': str(e)},
+                        [f"Error curating {file_path}: {e}"],
+                    )
+                for message in messages:
+                    print(message)
+                task_results[file_path] = checkpoint_result(file_checkpoint, SINGLE_PASS_STAGE, result)
+    else:
+        for file_path, function, args, kwargs in tasks:
+            task_results[file_path] = checkpoint_result(file_checkpoint, SINGLE_PASS_STAGE, function(*args, **kwargs))
+
+    results = []
+    for file_path in curated_filepaths:
+        if file_path == subjects_file:
+            result = subjects_result
+            if result['status'] == 'skipped':
+                result['control_uids'] = sorted(control_uids)
+        else:
+            result = task_results.get(file_path) or skipped[file_path]
+        results.append(result)
+    return results
+
+def print_curation_summary(results):
+    """Print the per-file curation status collected by curate_files_single_pass."""
+    print("\n=== Curation Summary ===")
+    print(f"Files Curated: {sum(1 for r in results if r['status'] == 'ok')} of {len(results)}")
+    skipped = sum(1 for r in results if r['status'] == 'skipped')
+    remapped = sum(1 for r in results if r['status'] == 'remapped')
+    if skipped or remapped:
+        print(f"Files Unchanged Since Last Run: {skipped + remapped} ({remapped} with updated control Participant_IDs)")
+    resumed = sum(1 for r in results if r.get('resumed'))
+    if resumed:
+        print(f"Files Resumed From the Checkpoint of the Interrupted Run: {resumed}")
+    invalid = sum(1 for r in results if r['status'] == 'invalid')
+    if invalid:
+        print(f"Files Failing Validation (not written by this run): {invalid}")
+    with_issues = [r for r in results if r['status'] != 'invalid' and r.get('issues')]
+    if with_issues:
+        print(f"Files With Data-Quality Issues (written, see the validation output above): {len(with_issues)}")
+    for result in results:
+        if result['status'] not in ('ok', 'skipped', 'remapped'):
+            print(f"  [{result['status'].upper()}] {os.path.basename(result['file_path'])}: {result['error']}")
+    print("========================\n")
+
+def run_curation(
+    input_dir, output_dir=None, single_pass=True, workers=1, chunksize=None, max_memory_mb=None,
+    output_formats=('csv',), incremental=True, report_path=None, summary=False, validate=False,
+    resume=False, subject_index=True
+):
+    """
+    Curate the NeuroBANK exports in input_dir without prompting (see README.md for the options).
+
+    Returns EXIT_OK, EXIT_FAILED or EXIT_USAGE.
+    """
     print("Starting Clinical Data Curation Script...")
     
-    # Step 1: Get file paths
-    filepath = get_filepaths()
+    if any(output_format != 'csv' for output_format in output_formats):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: Parquet/Arrow output requires the 'pyarrow' package. Please install it and try again.")
+            return EXIT_USAGE
+    
+    # Step 1: Check the input folder
+    filepath = input_dir
+    if not os.path.isdir(filepath):
+        print(f"Error: The folder '{filepath}' does not exist.")
+        return EXIT_USAGE
+    report = clinical_Run_Report.RunReport('curation')
     
     # Step 2: Define filenames
-    initial_filenames, curated_filenames = define_filenames()
+    with report.stage('define_filenames'):
+        initial_filenames, curated_filenames = define_filenames()
     
     # Step 3: Define headers
-    headers = define_headers()
+    with report.stage('define_headers'):
+        headers = define_headers()
     
-    # Step 4: Rename and move files
-    curated_filepaths = rename_and_move_files(filepath, initial_filenames, curated_filenames)
+    # Continue from the checkpoint of an interrupted run, or start a new one
+    clinical_dir = output_dir or os.path.join(filepath, "Clinical")
+    os.makedirs(clinical_dir, exist_ok=True)
+    index_path = clinical_Subject_Index.index_path_for(clinical_dir) if subject_index else None
+    checkpoint_options = {'single_pass': single_pass, 'output_formats': sorted(output_formats)}
+    if resume:
+        checkpoint = CurationCheckpoint.load(clinical_dir, checkpoint_options)
+    else:
+        checkpoint = CurationCheckpoint(clinical_dir, checkpoint_options)
+        checkpoint.remove()
     
-    # Step 5: Add 'Participant_ID' column
-    add_participant_id(curated_filepaths)
+    # Compare sources with the manifest of the previous run
+    manifest = {'subjects_sha256': None, 'control_uids': None, 'files': {}}
+    if single_pass and incremental:
+        with report.stage('load_manifest'):
+            manifest = load_manifest(clinical_dir)
+    unchanged_filenames, sources = set(), {}
+    if single_pass:
+        with report.stage('plan_incremental_curation'):
+            unchanged_filenames, sources = plan_incremental_curation(
+                filepath, initial_filenames, curated_filenames, headers, manifest, output_formats, clinical_dir
+            )
+        # Sources moved by an interrupted run, or kept aside for the files it finished, keep their recorded hashes
+        for name, source in checkpoint.sources.items():
+            if name in checkpoint.files or name not in sources:
+                sources[name] = source
+        checkpoint.sources = sources
+        checkpoint.save()
     
-    # Step 6: Reorder columns
-    reorder_columns(curated_filepaths, headers)
+    # Step 4: Rename and move files
+    with report.stage('rename_and_move_files'):
+        curated_filepaths, moved_filenames = rename_and_move_files(
+            filepath, initial_filenames, curated_filenames, unchanged_filenames, clinical_dir,
+            resumed_filenames=set(checkpoint.files)
+        )
+    # Exports moved by an interrupted run that it did not get to curate still hold the export
+    moved_filenames |= {name for name in checkpoint.moved if name not in checkpoint.files}
+    checkpoint.moved = sorted(moved_filenames)
+    checkpoint.save()
+    
+    if single_pass:
+        # Steps 5-8: Read each file once, apply every transform and write it once
+        unchanged_filepaths = {os.path.join(clinical_dir, name) for name in unchanged_filenames}
+        # Encodings detected while hashing apply only to files still holding their export
+        source_encodings = {
+            os.path.join(clinical_dir, name): sources[name].get('source_encoding')
+            for name in moved_filenames if name in sources
+        }
+        with report.stage('curate_files_single_pass') as stage:
+            results = curate_files_single_pass(
+                curated_filepaths, headers, workers=workers,
+                chunksize=chunksize, max_memory_mb=max_memory_mb, output_formats=output_formats,
+                unchanged_filepaths=unchanged_filepaths, previous_control_uids=manifest.get('control_uids'),
+                validate=validate, checkpoint=checkpoint, index_path=index_path,
+                source_encodings=source_encodings
+            )
+            stage['files'].extend(results)
+        restore_invalid_sources(filepath, initial_filenames, curated_filepaths, results, moved_filenames)
+        print_curation_summary(results)
+        with report.stage('save_manifest'):
+            save_manifest(clinical_dir, update_manifest(
+                manifest, results, curated_filenames, headers, sources, output_formats
+            ))
+    else:
+        # Step 5: Add 'Participant_ID' column
+        with report.stage('add_participant_id') as stage:
+            stage['files'].extend(add_participant_id(curated_filepaths, checkpoint))
+        
+        # Step 6: Reorder columns
+        with report.stage('reorder_columns') as stage:
+            stage['files'].extend(reorder_columns(curated_filepaths, headers, checkpoint))
+        
+        # Step 7: Clean NaN values
+        with report.stage('clean_nan_values') as stage:
+            stage['files'].extend(clean_nan_values(curated_filepaths, checkpoint))
+        
+        # Step 8: Update 'Participant_ID' for controls
+        with report.stage('update_participant_ids') as stage:
+            stage['files'].extend(update_participant_ids(curated_filepaths, checkpoint, index_path))
     
-    # Step 7: Clean NaN values
-    clean_nan_values(curated_filepaths)
+    # Index the files not written in this run that changed since they were indexed
+    if index_path is not None:
+        with report.stage('update_subject_index') as stage:
+            stage['files'].extend(clinical_Subject_Index.update_index(index_path, curated_filepaths))
     
-    # Step 8: Update 'Participant_ID' for controls
-    update_participant_ids(curated_filepaths)
+    report.finish(report_path, summary)
+    error_count = report.to_dict()['errors']
+    if error_count:
+        print(f"Clinical Data Curation Completed with {error_count} errors. Please review the issues above.")
+        print("Run again with --resume to redo only the files that did not complete.")
+    else:
+        checkpoint.remove()
+        print("Clinical Data Curation Completed Successfully.")
+    exit_code = EXIT_FAILED if error_count else EXIT_OK
+    if validate and single_pass and any(result.get('issues') for result in results):
+        # Same verdict as the validation script, which fails on any issue
+        exit_code = EXIT_FAILED
     
-    print("Clinical Data Curation Completed Successfully.")
+    if validate and not single_pass:
+        validation_report_path = None
+        if report_path:
+            # A JSON Lines report is shared; a JSON report gets a separate validation file
+            root, extension = os.path.splitext(report_path)
+            validation_report_path = report_path if extension == '.jsonl' else f"{root}_validation{extension}"
+        print()
+        validation_code = clinical_Package_Validation.run_validation(
+            clinical_dir, chunksize=chunksize, max_memory_mb=max_memory_mb,
+            report_path=validation_report_path, summary=summary
+        )
+        if validation_code != clinical_Package_Validation.EXIT_OK:
+            exit_code = EXIT_FAILED
+    return exit_code
+
+def main(
+    single_pass=True, workers=1, chunksize=None, max_memory_mb=None, output_formats=('csv',),
+    incremental=True, report_path=None, summary=False, input_dir=None, output_dir=None, validate=False,
+    resume=False, subject_index=True
+):
+    """Main function to orchestrate the data curation process."""
+    if input_dir is None:
+        input_dir = get_filepaths()
+    return run_curation(
+        input_dir, output_dir, single_pass=single_pass, workers=workers, chunksize=chunksize,
+        max_memory_mb=max_memory_mb, output_formats=output_formats, incremental=incremental,
+        report_path=report_path, summary=summary, validate=validate, resume=resume,
+        subject_index=subject_index
+    )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Curate the NeuroBANK Clinical Data files into the 'Clinical' package.")
+    parser.add_argument(
+        "--input-dir", default=None,
+        help="Folder with the NeuroBANK Clinical Data files; asked for at the prompt if not given."
+    )
+    parser.add_argument(
+        "--output-dir", default=None,
+        help="Folder for the curated package (default: 'Clinical' inside the input folder)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes used to curate files concurrently (default: 1)."
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Stream each file in chunks of this many rows instead of loading it whole."
+    )
+    parser.add_argument(
+        "--max-memory-mb", type=float, default=None,
+        help="Stream each file in chunks sized to stay under this much memory per worker ('subjects.csv' is read whole)."
+    )
+    parser.add_argument(
+        "--format", dest="formats", action="append", choices=sorted(COLUMNAR_EXTENSIONS), default=[],
+        help=(
+            "Also write each curated table in this columnar format next to its CSV; may be repeated. Columns have "
+            "fixed types from the registry, and values that do not parse are kept as text in '<column>_raw'."
+        )
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help=(
+            "Curate every file even if the manifest (curation_manifest.json in the output folder) shows that its "
+            "export, headers and curated output are unchanged since the last run."
+        )
+    )
+    parser.add_argument(
+        "--report", default=None,
+        help="Write a run report with per-step and per-file metrics to this path (JSON, or JSON Lines appended to a '.jsonl' path)."
+    )
+    parser.add_argument(
+        "--summary", action="store_true",
+        help="Print the run report as a table at the end."
+    )
+    parser.add_argument(
+        "--validate", action="store_true",
+        help=(
+            "Check every curated file against all the validation rules (as the validation script does) before it is "
+            "written. Files with unknown SubjectUIDs or wrong Participant_ID prefixes are not written and go back to "
+            "the input folder; other issues (such as duplicate visits) are reported and make the run exit with 1. "
+            "Unchanged and resumed files are checked from disk."
+        )
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help=(
+            "Continue an interrupted or failed run from its checkpoint (curation_checkpoint.json in the output "
+            "folder), skipping the files it had finished. A checkpoint left with other options is ignored."
+        )
+    )
+    parser.add_argument(
+        "--no-subject-index", dest="subject_index", action="store_false",
+        help="Do not build the subject index (subject_index.sqlite in the output folder) used for per-participant lookups."
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunksize is not None and args.chunksize < 1:
+        parser.error("--chunksize must be at least 1")
+    if args.max_memory_mb is not None and args.max_memory_mb <= 0:
+        parser.error("--max-memory-mb must be positive")
+    sys.exit(main(
+        workers=args.workers, chunksize=args.chunksize, max_memory_mb=args.max_memory_mb,
+        output_formats=('csv', *args.formats), incremental=not args.full,
+        report_path=args.report, summary=args.summary,
+        input_dir=args.input_dir, output_dir=args.output_dir, validate=args.validate, resume=args.resume,
+        subject_index=args.subject_index
+    ))
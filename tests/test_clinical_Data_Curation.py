@@ -0,0 +1,160 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+import clinical_Data_Curation as curation
+import clinical_Subject_Index
+
+
+def write_export(input_dir, curated_name, rows):
+    """Write a NeuroBANK export for the curated file curated_name from a list of row dicts."""
+    initial_filenames, curated_filenames = curation.define_filenames()
+    initial_name = initial_filenames[curated_filenames.index(curated_name)]
+    pd.DataFrame(rows).to_csv(os.path.join(input_dir, initial_name), index=False)
+
+
+def write_subjects(input_dir, control_uids):
+    write_export(input_dir, 'subjects.csv', [
+        {'SubjectUID': uid, 'subject_group_id': 5 if uid in control_uids else 1}
+        for uid in ('NEU1', 'NEU2', 'NEU3')
+    ])
+
+
+def write_demographics(input_dir):
+    write_export(input_dir, 'Demographics.csv', [
+        {'SubjectUID': uid, 'Form_Name': 'Demographics', 'Visit_Name': 'Baseline'}
+        for uid in ('NEU1', 'NEU2', 'NEU3')
+    ])
+
+
+def participant_ids(clinical_dir, curated_name='Demographics.csv'):
+    df = pd.read_csv(os.path.join(clinical_dir, curated_name), dtype=str)
+    return dict(zip(df['SubjectUID'], df['Participant_ID']))
+
+
+def test_files_curated_before_subjects_is_delivered_get_the_controls(tmp_path):
+    write_demographics(tmp_path)
+    curation.run_curation(str(tmp_path))
+    clinical_dir = tmp_path / 'Clinical'
+    assert participant_ids(clinical_dir)['NEU2'] == 'CASE-NEU2'
+
+    write_subjects(tmp_path, {'NEU2'})
+    curation.run_curation(str(tmp_path))
+    assert participant_ids(clinical_dir) == {'NEU1': 'CASE-NEU1', 'NEU2': 'CTRL-NEU2', 'NEU3': 'CASE-NEU3'}
+
+
+def test_recurating_a_curated_file_drops_removed_controls(tmp_path):
+    write_subjects(tmp_path, {'NEU2'})
+    write_demographics(tmp_path)
+    curation.run_curation(str(tmp_path))
+    clinical_dir = tmp_path / 'Clinical'
+    assert participant_ids(clinical_dir)['NEU2'] == 'CTRL-NEU2'
+
+    write_subjects(tmp_path, {'NEU3'})
+    curation.run_curation(str(tmp_path), incremental=False)
+    assert participant_ids(clinical_dir) == {'NEU1': 'CASE-NEU1', 'NEU2': 'CASE-NEU2', 'NEU3': 'CTRL-NEU3'}
+
+
+def test_changed_controls_are_remapped_in_unchanged_files(tmp_path):
+    write_subjects(tmp_path, {'NEU2'})
+    write_demographics(tmp_path)
+    curation.run_curation(str(tmp_path))
+
+    write_subjects(tmp_path, {'NEU3'})
+    curation.run_curation(str(tmp_path))
+    assert participant_ids(tmp_path / 'Clinical') == {'NEU1': 'CASE-NEU1', 'NEU2': 'CASE-NEU2', 'NEU3': 'CTRL-NEU3'}
+
+
+def test_index_written_while_streaming_matches_a_scan_of_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(curation, 'CSV_WRITE_ROWS', 2)
+    write_subjects(tmp_path, {'NEU2'})
+    write_export(tmp_path, 'Medical_History.csv', [
+        {'SubjectUID': uid, 'Form_Name': 'Medical_History', 'Visit_Name': f"line 1\nline {number}"}
+        for number, uid in enumerate(['NEU1', 'NEU2', 'NEU3', 'NEU1', 'NEU2'])
+    ])
+    curation.run_curation(str(tmp_path), chunksize=3)
+
+    clinical_dir = tmp_path / 'Clinical'
+    index_path = clinical_Subject_Index.index_path_for(str(clinical_dir))
+    connection = sqlite3.connect(index_path)
+    try:
+        indexed = pd.read_sql_query(
+            "SELECT row_number, subject_uid, participant_id, byte_offset, byte_length FROM records "
+            "WHERE table_name = 'Medical_History' ORDER BY row_number",
+            connection
+        )
+    finally:
+        connection.close()
+    scanned = clinical_Subject_Index.scan_file(str(clinical_dir / 'Medical_History.csv'))
+    pd.testing.assert_frame_equal(indexed, scanned, check_dtype=False)
+
+
+def test_validate_withholds_only_files_failing_the_participant_id_rules(tmp_path):
+    write_subjects(tmp_path, {'NEU2'})
+    # A log table repeats visits, which is reported but does not stop the file from being written
+    write_export(tmp_path, 'NIV_Log.csv', [
+        {'SubjectUID': 'NEU1', 'Form_Name': 'NIV_Log', 'Visit_Name': 'Log'},
+        {'SubjectUID': 'NEU1', 'Form_Name': 'NIV_Log', 'Visit_Name': 'Log'},
+    ])
+    write_export(tmp_path, 'Demographics.csv', [
+        {'SubjectUID': 'NEU1', 'Form_Name': 'Demographics', 'Visit_Name': 'Baseline'},
+        {'SubjectUID': 'NEU9', 'Form_Name': 'Demographics', 'Visit_Name': 'Baseline'},
+    ])
+    exit_code = curation.run_curation(str(tmp_path), validate=True)
+
+    clinical_dir = tmp_path / 'Clinical'
+    assert exit_code == curation.EXIT_FAILED
+    assert participant_ids(clinical_dir, 'NIV_Log.csv') == {'NEU1': 'CASE-NEU1'}
+    assert not (clinical_dir / 'Demographics.csv').exists()
+    assert (tmp_path / 'v_NB_IATI_Demographics.csv').exists()
+
+
+def test_resume_after_an_interrupted_run_curates_only_the_unfinished_files(tmp_path, monkeypatch):
+    write_subjects(tmp_path, {'NEU2'})
+    _, curated_filenames = curation.define_filenames()
+    for curated_name in curated_filenames:
+        if curated_name != 'subjects.csv':
+            form_name = curated_name[:-len('.csv')]
+            write_export(tmp_path, curated_name, [
+                {'SubjectUID': uid, 'Form_Name': form_name, 'Visit_Name': 'Baseline'}
+                for uid in ('NEU1', 'NEU2', 'NEU3')
+            ])
+    curate_file = curation.curate_file
+    curated = []
+
+    def interrupted_after_two_files(file_path, *args, **kwargs):
+        if len(curated) == 2:
+            raise KeyboardInterrupt
+        curated.append(os.path.basename(file_path))
+        return curate_file(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(curation, 'curate_file', interrupted_after_two_files)
+    try:
+        curation.run_curation(str(tmp_path))
+    except KeyboardInterrupt:
+        pass
+    clinical_dir = tmp_path / 'Clinical'
+    assert (clinical_dir / curation.CHECKPOINT_FILENAME).exists()
+
+    resumed = []
+
+    def recorded(file_path, *args, **kwargs):
+        resumed.append(os.path.basename(file_path))
+        return curate_file(file_path, *args, **kwargs)
+
+    def not_curated_again(*args, **kwargs):
+        raise AssertionError("subjects.csv was curated again")
+
+    monkeypatch.setattr(curation, 'curate_file', recorded)
+    monkeypatch.setattr(curation, 'curate_subjects_file', not_curated_again)
+    assert curation.run_curation(str(tmp_path), resume=True) == curation.EXIT_OK
+
+    assert not set(curated) & set(resumed)
+    assert sorted(curated + resumed) == sorted(name for name in curated_filenames if name != 'subjects.csv')
+    for curated_name in curated_filenames:
+        if curated_name != 'subjects.csv':
+            assert participant_ids(clinical_dir, curated_name) == {
+                'NEU1': 'CASE-NEU1', 'NEU2': 'CTRL-NEU2', 'NEU3': 'CASE-NEU3'
+            }
+    assert not (clinical_dir / curation.CHECKPOINT_FILENAME).exists()
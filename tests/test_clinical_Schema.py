@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+import clinical_Schema
+
+
+def test_to_columnar_keeps_unparseable_values_as_raw_text():
+    df = pd.DataFrame({
+        'SubjectUID': ['NEU1', 'NEU2', 'NEU3'],
+        'age': ['61', 'unknown', None],
+        'Visit_Date': ['2020-01-31', '2020-02-30', '01/03/2020'],
+    }, dtype='string')
+    unparsed = {}
+
+    columnar = clinical_Schema.to_columnar(df, unparsed)
+
+    assert list(columnar.columns) == ['SubjectUID', 'age', 'age_raw', 'Visit_Date', 'Visit_Date_raw']
+    assert columnar['age'].tolist() == [61.0, pd.NA, pd.NA]
+    assert columnar['age_raw'].tolist() == [pd.NA, 'unknown', pd.NA]
+    assert columnar['Visit_Date_raw'].tolist() == [pd.NA, '2020-02-30', pd.NA]
+    assert unparsed == {'age': 1, 'Visit_Date': 1}
+
+
+def test_columnar_dtypes_do_not_depend_on_the_data():
+    columns = ['SubjectUID', 'age', 'Visit_Date']
+    parsed = clinical_Schema.to_columnar(pd.DataFrame({
+        'SubjectUID': ['NEU1'], 'age': ['61'], 'Visit_Date': ['2020-01-31']
+    }, dtype='string'))
+    unparsed = clinical_Schema.to_columnar(pd.DataFrame({
+        'SubjectUID': ['NEU1'], 'age': ['n/a'], 'Visit_Date': ['soon']
+    }, dtype='string'))
+
+    assert parsed.dtypes.equals(unparsed.dtypes)
+    assert {column: str(dtype) for column, dtype in parsed.dtypes.items()} == {
+        column: str(pd.Series(dtype=dtype).dtype)
+        for column, dtype in clinical_Schema.columnar_dtypes(columns).items()
+    }
+
+
+ROWS = [['SubjectUID', 'medhxdsc'], ['NEU1', 'Café au lait spots'], ['NEU2', '“Quoted” reply – see notes']]
+
+
+def write_export(tmp_path, text, encoding):
+    file_path = tmp_path / f"export_{encoding}.csv"
+    file_path.write_bytes(text.encode(encoding))
+    return str(file_path)
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 5, clinical_Schema.DETECT_BLOCK_SIZE])
+@pytest.mark.parametrize('encoding, text', [
+    ('utf-8', ''.join(','.join(row) + '\n' for row in ROWS)),
+    ('utf-8-sig', ''.join(','.join(row) + '\n' for row in ROWS)),
+    ('cp1252', ''.join(','.join(row) + '\n' for row in ROWS)),
+    # '\x90' is not defined in cp1252
+    ('latin-1', 'SubjectUID,medhxdsc\nNEU1,Café\x90\n'),
+])
+def test_detect_encoding(tmp_path, block_size, encoding, text):
+    file_path = write_export(tmp_path, text, encoding)
+
+    assert clinical_Schema.detect_encoding(file_path, block_size) == encoding
+    df = clinical_Schema.read_clinical_csv(file_path)
+    assert list(df.columns) == ['SubjectUID', 'medhxdsc']
+    assert df['medhxdsc'].tolist() == [line.split(',')[1] for line in text.splitlines()[1:]]
+
+
+def test_ascii_is_read_as_utf8(tmp_path):
+    file_path = write_export(tmp_path, 'SubjectUID,age\nNEU1,61\n', 'ascii')
+
+    assert clinical_Schema.detect_encoding(file_path) == 'utf-8'
+
+
+def test_utf8_cut_off_in_a_multibyte_sequence_is_not_utf8(tmp_path):
+    file_path = tmp_path / 'export.csv'
+    file_path.write_bytes('SubjectUID,medhxdsc\nNEU1,Café'.encode('utf-8')[:-1])
+
+    assert clinical_Schema.detect_encoding(str(file_path), block_size=4) == 'cp1252'
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import clinical_Subject_Index as subject_index
+
+HEADER = b'Participant_ID,SubjectUID,Form_Name,notes\n'
+RECORDS = [
+    b'CASE-NEU1,NEU1,Medical_History,"first line\nsecond line"\n',
+    b'CTRL-NEU2,NEU2,Medical_History,plain\n',
+    b'CASE-NEU1,NEU1,Medical_History,"quoted ""comma, and\r\nbreak"""\n',
+    b'CASE-NEU3,NEU3,Medical_History,\n',
+]
+CURATED_CSV = HEADER + b''.join(RECORDS)
+
+
+def expected_spans():
+    """Return the (offset, length) of every record after the header."""
+    spans, offset = [], len(HEADER)
+    for record in RECORDS:
+        spans.append((offset, len(record)))
+        offset += len(record)
+    return spans
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 7, 16, 41, 1024])
+def test_scan_file_keeps_quoted_newlines_split_across_blocks(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(subject_index, 'SCAN_BLOCK_SIZE', block_size)
+    file_path = tmp_path / 'Medical_History.csv'
+    file_path.write_bytes(CURATED_CSV)
+
+    records = subject_index.scan_file(str(file_path))
+
+    assert list(zip(records['byte_offset'], records['byte_length'])) == expected_spans()
+    assert records['subject_uid'].tolist() == ['NEU1', 'NEU2', 'NEU1', 'NEU3']
+    assert records['participant_id'].tolist() == ['CASE-NEU1', 'CTRL-NEU2', 'CASE-NEU1', 'CASE-NEU3']
+
+
+def test_scan_file_without_trailing_newline(tmp_path, monkeypatch):
+    monkeypatch.setattr(subject_index, 'SCAN_BLOCK_SIZE', 5)
+    file_path = tmp_path / 'Medical_History.csv'
+    file_path.write_bytes(CURATED_CSV.rstrip(b'\n'))
+
+    records = subject_index.scan_file(str(file_path))
+
+    assert records['byte_offset'].iloc[-1] + records['byte_length'].iloc[-1] == len(CURATED_CSV) - 1
+
+
+def test_records_are_read_back_by_subject(tmp_path):
+    clinical_dir = tmp_path / 'Clinical'
+    clinical_dir.mkdir()
+    file_path = clinical_dir / 'Medical_History.csv'
+    file_path.write_bytes(CURATED_CSV)
+    subject_index.update_index(subject_index.index_path_for(str(clinical_dir)), [str(file_path)])
+
+    with subject_index.SubjectIndex(str(clinical_dir)) as index:
+        assert index.tables('CASE-NEU1') == {'Medical_History': 2}
+        rows = index.records('NEU1')['Medical_History']
+    assert rows['notes'].tolist() == ['first line\nsecond line', 'quoted "comma, and\r\nbreak"']
+
+
+def test_table_index_writer_replaces_records_only_on_close(tmp_path):
+    index_path = str(tmp_path / subject_index.SUBJECT_INDEX_FILENAME)
+    file_path = tmp_path / 'Medical_History.csv'
+    file_path.write_bytes(CURATED_CSV)
+    records = subject_index.scan_file(str(file_path))
+    subject_index.write_table(index_path, str(file_path), records)
+
+    writer = subject_index.TableIndexWriter(index_path, str(file_path))
+    writer.write(records.iloc[:2])
+    writer.abort()
+    writer = subject_index.TableIndexWriter(index_path, str(file_path))
+    for start in range(0, len(records), 3):
+        writer.write(records.iloc[start:start + 3])
+    writer.close()
+
+    connection = sqlite3.connect(index_path)
+    try:
+        tables = [name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        indexed = pd.read_sql_query(
+            "SELECT row_number, byte_offset FROM records WHERE table_name = 'Medical_History' ORDER BY row_number",
+            connection
+        )
+    finally:
+        connection.close()
+    assert sorted(tables) == ['records', 'tables']
+    assert indexed['byte_offset'].tolist() == records['byte_offset'].tolist()
@@ -1,8 +1,55 @@
 # clinical_package_validation.py
 
+import argparse
 import os
+import sys
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import clinical_Run_Report
+import clinical_Schema
+from clinical_Schema import define_curated_filenames, define_headers
+
+# Default number of issue lines printed per rule and file
+MAX_REPORT_LINES = 50
+
+# Validation rules, in report order
+RULES = ('header', 'sentinel', 'unknown_subject_uid', 'participant_id_prefix', 'duplicate_visit', 'visit_date')
+
+# Rules checked by validate_participant_ids, and the ones that keep the curation script from writing a file
+PARTICIPANT_ID_RULES = ('unknown_subject_uid', 'participant_id_prefix')
+
+# Columns each rule reads (None: every column of the file)
+RULE_COLUMNS = {
+    'header': None,
+    'sentinel': None,
+    'unknown_subject_uid': ('SubjectUID',),
+    'participant_id_prefix': ('SubjectUID', 'Participant_ID'),
+    'duplicate_visit': ('SubjectUID', 'Visit_Name', 'Form_Name'),
+    'visit_date': ('Visit_Date',),
+}
+
+RULE_DESCRIPTIONS = {
+    'header': "header differs from the registry",
+    'sentinel': "'.' values left by curation",
+    'unknown_subject_uid': "SubjectUID not in subjects.csv",
+    'participant_id_prefix': "Participant_ID prefix does not match the group",
+    'duplicate_visit': "duplicate (SubjectUID, Visit_Name, Form_Name) rows",
+    'visit_date': "unparseable Visit_Date",
+}
+
+# Key of one form filled in at one visit, expected once per file
+VISIT_KEY = ('SubjectUID', 'Visit_Name', 'Form_Name')
+
+# Columns the row rules read, where leftover '.' sentinels count as missing
+KEY_COLUMNS = ('SubjectUID', 'Participant_ID', 'Visit_Name', 'Form_Name', 'Visit_Date')
+
+# Exit codes of run_validation / main: all files pass, issues found, unusable input
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
 def get_clinical_folder():
     """Prompt user for the Clinical folder path and return it."""
     folder_path = input(
@@ -10,25 +57,6 @@ def get_clinical_folder():
     ).strip()
     return folder_path
 
-def define_curated_filenames():
-    """Define curated filenames."""
-    curated_filenames = [
-        'AALSDXFX.csv', 'AALSHXFX.csv', 'ALS_CBS.csv', 'ALS_Gene_Mutations.csv',
-        'ALSFRS_R.csv', 'ANSASFD.csv', 'ANSWER_ALS_Medications_Log.csv',
-        'ANSWER_ALS_MobileApp.csv', 'Ashworth_Spasticity_Scale.csv',
-        'Auxiliary_Chemistry.csv', 'Auxiliary_Chemistry_Labs.csv',
-        'Cerebrospinal_Fluid.csv', 'CNS_Lability_Scale.csv', 'Demographics.csv',
-        'Diaphragm_Pacing_System_Device.csv', 'DNA_Sample_Collection.csv',
-        'Environmental_Questionnaire.csv', 'Family_History_Log.csv',
-        'Feeding_Tube_Placement.csv', 'Grip_Strength_Testing.csv',
-        'Hand_Held_Dynamometry.csv', 'Medical_History.csv', 'Mortality.csv',
-        'NEUROLOG.csv', 'NIV_Log.csv', 'PBMC_Sample_Collection.csv',
-        'Permanent_Assisted_Ventilation.csv', 'Plasma_Sample.csv', 'Reflexes.csv',
-        'Serum_Sample.csv', 'subjects.csv', 'Tracheostomy.csv',
-        'Vital_Capacity.csv', 'Vital_Signs.csv'
-    ]
-    return curated_filenames
-
 def create_full_filepaths(clinical_folder, curated_filenames):
     """Create full file paths for each curated file."""
     return [os.path.join(clinical_folder, filename) for filename in curated_filenames]
@@ -36,10 +64,10 @@ def create_full_filepaths(clinical_folder, curated_filenames):
 def load_subjects(subjects_filepath):
     """Load subjects.csv and return a mapping of SubjectUID to group ('CASE' or 'CTRL')."""
     try:
-        subjects_df = pd.read_csv(subjects_filepath, encoding='unicode_escape')
-        # Assuming 'subject_group_id' == 5 indicates control
-        subjects_df['Group'] = subjects_df['subject_group_id'].apply(lambda x: 'CTRL' if x == 5 else 'CASE')
-        uid_to_group = subjects_df.set_index('SubjectUID')['Group'].to_dict()
+        subjects_df = clinical_Schema.read_clinical_csv(
+            subjects_filepath, ['SubjectUID', 'subject_group_id'], encoding=clinical_Schema.CURATED_ENCODING
+        )
+        uid_to_group = build_uid_to_group(subjects_df)
         print(f"Loaded subjects.csv with {len(uid_to_group)} participants.")
         return uid_to_group
     except FileNotFoundError:
@@ -49,100 +77,394 @@ def load_subjects(subjects_filepath):
         print(f"Error loading 'subjects.csv': {e}")
         return {}
 
-def validate_participant_ids(file_path, uid_to_group):
-    """Validate Participant_ID prefixes based on SubjectUID."""
-    try:
-        df = pd.read_csv(file_path, encoding='unicode_escape', dtype=str)
-        if 'Participant_ID' not in df.columns or 'SubjectUID' not in df.columns:
-            print(f"[WARNING] 'Participant_ID' or 'SubjectUID' column missing in {os.path.basename(file_path)}. Skipping Participant_ID validation.")
-            return True
-        
-        # Drop rows where SubjectUID is NaN
-        df = df.dropna(subset=['SubjectUID'])
-        
-        # Initialize lists to collect mismatches
-        mismatches = []
+def build_uid_to_group(subjects_df):
+    """Return a mapping of SubjectUID to group ('CASE' or 'CTRL') from a subjects DataFrame."""
+    # Assuming 'subject_group_id' == 5 indicates control
+    is_control = pd.to_numeric(subjects_df['subject_group_id'], errors='coerce') == 5
+    groups = is_control.map({True: 'CTRL', False: 'CASE'})
+    return dict(zip(subjects_df['SubjectUID'], groups))
+
+def rule_columns(rules):
+    """Return the columns the given rules read, or None when a rule needs every column."""
+    columns = []
+    for rule in rules:
+        if RULE_COLUMNS[rule] is None:
+            return None
+        columns.extend(column for column in RULE_COLUMNS[rule] if column not in columns)
+    return columns
+
+class FileValidator:
+    """
+    Check one curated file against the validation rules, a DataFrame or chunk at a time.
+
+    check() is called on every chunk as it is read from disk or, from the curation
+    script, as it is curated and before it is written; report() then prints the result.
+    Every rule is a vectorized check over the chunk, so checking all of them costs about
+    one read of the data. Per rule, only the issues that will be printed are kept, plus
+    a running count. Rules whose columns are not in the file are skipped.
+    """
+
+    def __init__(self, file_path, uid_to_group, desired_headers=None, rules=RULES, max_report_lines=MAX_REPORT_LINES):
+        self.file_path = file_path
+        self.uid_to_group = uid_to_group
+        # Hashed once here rather than on every chunk
+        self.group_by_uid = pd.Series(uid_to_group, dtype=object)
+        self.desired_headers = desired_headers
+        self.rules = [rule for rule in rules if rule != 'header' or desired_headers is not None]
+        self.max_report_lines = max_report_lines
+        self.issue_counts = {rule: 0 for rule in self.rules}
+        self.reported = {rule: [] for rule in self.rules}
+        self.skipped_rules = []
+        self.rows_checked = 0
+        self.seen_visit_keys = set()
+
+    @property
+    def issue_count(self):
+        return sum(self.issue_counts.values())
+
+    @property
+    def passed(self):
+        return self.issue_count == 0
+
+    def passes(self, rules):
+        """Return True if the file has no issues under the given rules."""
+        return all(self.issue_counts.get(rule, 0) == 0 for rule in rules)
+
+    def check(self, df):
+        if self.rows_checked == 0:
+            # Rules are matched to the file's columns once, on its first chunk
+            for rule in self.rules:
+                if RULE_COLUMNS[rule] is not None and not set(RULE_COLUMNS[rule]) <= set(df.columns):
+                    self.skipped_rules.append(rule)
+            self.rules = [rule for rule in self.rules if rule not in self.skipped_rules]
+        rows = pd.Series(np.arange(len(df)) + self.rows_checked + 1, index=df.index)
+        if 'sentinel' in self.rules:
+            sentinels = df.eq('.')
+            self.add_issues('sentinel', rows, self.find_sentinels(sentinels), df)
+            # The other rules see leftover sentinels as missing values, reported once above
+            key_columns = [column for column in KEY_COLUMNS if column in df.columns]
+            df = df.assign(**{column: df[column].mask(sentinels[column]) for column in key_columns})
+        for rule in self.rules:
+            if rule == 'header':
+                if self.rows_checked == 0:
+                    self.add_issues(rule, None, self.find_header_issues(df.columns), df)
+            elif rule != 'sentinel':
+                self.add_issues(rule, rows, getattr(self, f"find_{rule}")(df), df)
+        self.rows_checked += len(df)
+
+    def add_issues(self, rule, rows, issues, df):
+        """Count a rule's issues (a Series of messages indexed like df) and keep the ones to print."""
+        self.issue_counts[rule] += len(issues)
+        kept = sum(len(reported) for reported in self.reported[rule])
+        if self.max_report_lines is not None:
+            issues = issues.head(max(self.max_report_lines - kept, 0))
+        if issues.empty:
+            return
+        if rows is None:
+            self.reported[rule].append(pd.DataFrame({
+                'row': None, 'SubjectUID': None, 'Participant_ID': None, 'issue': issues
+            }))
+        else:
+            missing = pd.Series(None, index=df.index, dtype=object)
+            uids = df['SubjectUID'] if 'SubjectUID' in df.columns else missing
+            participant_ids = df['Participant_ID'] if 'Participant_ID' in df.columns else missing
+            self.reported[rule].append(pd.DataFrame({
+                'row': rows[issues.index], 'SubjectUID': uids[issues.index],
+                'Participant_ID': participant_ids[issues.index], 'issue': issues,
+            }))
+
+    def find_header_issues(self, columns):
+        """Return the header differences from the registry order as a one-message Series (empty if it matches)."""
+        actual = list(columns)
+        if actual == self.desired_headers:
+            return pd.Series([], dtype=object)
+        missing = [column for column in self.desired_headers if column not in actual]
+        unexpected = [column for column in actual if column not in self.desired_headers]
+        problems = []
+        if missing:
+            problems.append(f"missing columns {missing}")
+        if unexpected:
+            problems.append(f"unexpected columns {unexpected}")
+        if not problems:
+            problems.append("columns are not in the registry order")
+        return pd.Series(["Header does not match the registry: " + "; ".join(problems)], dtype=object)
+
+    def find_sentinels(self, sentinels):
+        """Return a message per row with '.' values left in it, naming their columns."""
+        hits = sentinels[sentinels.any(axis=1)]
+        return "'.' left in " + hits.dot(hits.columns + ', ').str[:-2].astype(object)
+
+    def groups_of(self, uids):
+        """Return the group of every SubjectUID in uids, missing for UIDs not in subjects.csv."""
+        positions = self.group_by_uid.index.get_indexer(uids)
+        groups = self.group_by_uid.to_numpy().take(positions)
+        return pd.Series(groups, index=uids.index, dtype=object).where(positions >= 0)
+
+    def find_unknown_subject_uid(self, df):
+        """Return a message per row whose SubjectUID is not in subjects.csv."""
+        uids = df['SubjectUID']
+        unknown = uids.notna() & self.groups_of(uids).isna()
+        return pd.Series("Unknown SubjectUID", index=uids.index[unknown], dtype=object)
+
+    def find_participant_id_prefix(self, df):
+        """Return a message per row whose Participant_ID prefix does not match the SubjectUID's group."""
+        expected_group = self.groups_of(df['SubjectUID'])
         
-        for idx, row in df.iterrows():
-            subject_uid = row['SubjectUID']
-            participant_id = row['Participant_ID']
-            expected_group = uid_to_group.get(subject_uid, None)
-            
-            if expected_group is None:
-                mismatches.append((subject_uid, participant_id, "Unknown SubjectUID"))
+        # One vectorized prefix check per group ('CASE', 'CTRL')
+        wrong_prefix = pd.Series(False, index=df.index)
+        for group in expected_group.dropna().unique():
+            in_group = expected_group == group
+            has_prefix = df['Participant_ID'].str.startswith(f"{group}-", na=False)
+            wrong_prefix |= in_group & ~has_prefix
+        return ("Expected prefix '" + expected_group[wrong_prefix].astype(str) + "-'").astype(object)
+
+    def find_duplicate_visit(self, df):
+        """Return a message per row repeating the (SubjectUID, Visit_Name, Form_Name) of an earlier row."""
+        keys = df.loc[df['SubjectUID'].notna(), list(VISIT_KEY)]
+        hashes = pd.util.hash_pandas_object(keys, index=False)
+        # Earlier rows are remembered as key hashes only, so later chunks are checked against them too;
+        # a set grows with each chunk instead of being rebuilt from every hash seen so far
+        values = hashes.tolist()
+        seen_before = np.fromiter((value in self.seen_visit_keys for value in values), dtype=bool, count=len(values))
+        duplicated = hashes.duplicated() | seen_before
+        self.seen_visit_keys.update(values)
+        duplicates = keys[duplicated.to_numpy()].astype(object).fillna('').astype(str)
+        return (
+            "Duplicate of an earlier row for Visit_Name '" + duplicates['Visit_Name']
+            + "', Form_Name '" + duplicates['Form_Name'] + "'"
+        ).astype(object)
+
+    def find_visit_date(self, df):
+        """Return a message per row whose Visit_Date cannot be parsed as a date."""
+        values = df['Visit_Date']
+        unparseable = values.notna() & clinical_Schema.parse_dates(values).isna()
+        return ("Unparseable Visit_Date '" + values[unparseable].astype(str) + "'").astype(object)
+
+    def report(self, log=print):
+        """Print the PASS/FAIL result and the reported issues per rule; return True if the file passed."""
+        filename = os.path.basename(self.file_path)
+        if self.skipped_rules:
+            log(f"[SKIP] {', '.join(self.skipped_rules)}: column(s) not in {filename}.")
+        if self.passed:
+            log(f"[PASS] {filename} passed {', '.join(self.rules) or 'no rules'}.")
+            return True
+        log(f"[FAIL] Validation issues found in {filename}:")
+        for rule in self.rules:
+            if self.issue_counts[rule] == 0:
                 continue
-            
-            expected_prefix = f"{expected_group}-"
-            if not participant_id.startswith(expected_prefix):
-                mismatches.append((subject_uid, participant_id, f"Expected prefix '{expected_prefix}'"))
+            log(f"  {rule} ({RULE_DESCRIPTIONS[rule]}): {self.issue_counts[rule]}")
+            shown = 0
+            for issues in self.reported[rule]:
+                for row, uid, participant_id, issue in issues.itertuples(index=False):
+                    if row is None:
+                        location = "Header"
+                    elif rule in PARTICIPANT_ID_RULES:
+                        # Same lines as the Participant_ID check has always printed
+                        location = f"SubjectUID: {uid}, Participant_ID: {participant_id}"
+                    else:
+                        location = f"Row {row}, SubjectUID: {uid}"
+                    log(f"    {location} - {issue}")
+                    shown += 1
+            if self.issue_counts[rule] > shown:
+                log(f"    ... and {self.issue_counts[rule] - shown} more not shown.")
+        return False
+
+def validate_file(
+    file_path, uid_to_group, desired_headers=None, rules=RULES, chunksize=None,
+    max_report_lines=MAX_REPORT_LINES, metrics=None
+):
+    """
+    Check a curated file against the validation rules in one pass over its rows.
+
+    With chunksize the file is streamed in chunks of that many rows instead of being
+    loaded whole; the report is the same either way. At most max_report_lines issues
+    are printed per rule (None prints all of them), followed by a count of the rest.
+    The rows and bytes read are added to metrics (a clinical_Run_Report.FileMetrics),
+    if given. Returns the FileValidator, or None if the file could not be read.
+    """
+    metrics = metrics or clinical_Run_Report.FileMetrics()
+    try:
+        metrics.read(0, os.path.getsize(file_path))
+        # '.' is kept as text so that leftover sentinels can be found
+        read_options = {'na_values': [], 'encoding': clinical_Schema.CURATED_ENCODING}
+        if chunksize is not None:
+            read_options['chunksize'] = chunksize
+        data = clinical_Schema.read_clinical_csv(file_path, rule_columns(rules), **read_options)
+        chunks = [data] if chunksize is None else data
         
-        if not mismatches:
-            print(f"[PASS] All Participant_ID prefixes are correct in {os.path.basename(file_path)}.")
-            return True
-        else:
-            print(f"[FAIL] Participant_ID prefix mismatches found in {os.path.basename(file_path)}:")
-            for uid, pid, issue in mismatches:
-                print(f"  SubjectUID: {uid}, Participant_ID: {pid} - {issue}")
-            return False
+        validator = FileValidator(file_path, uid_to_group, desired_headers, rules, max_report_lines)
+        for df in chunks:
+            metrics.read(len(df))
+            validator.check(df)
+        validator.report()
+        return validator
     except Exception as e:
-        print(f"[ERROR] Failed to validate Participant_ID in {os.path.basename(file_path)}: {e}")
-        return False
+        print(f"[ERROR] Failed to validate {os.path.basename(file_path)}: {e}")
+        return None
+
+def validate_participant_ids(file_path, uid_to_group, chunksize=None, max_report_lines=MAX_REPORT_LINES, metrics=None):
+    """Validate Participant_ID prefixes based on SubjectUID only; return True if the file passed."""
+    validator = validate_file(
+        file_path, uid_to_group, rules=PARTICIPANT_ID_RULES, chunksize=chunksize,
+        max_report_lines=max_report_lines, metrics=metrics
+    )
+    return validator is not None and validator.passed
+
+def print_validation_summary(issue_totals, files_with_issues):
+    """Print the issues found per rule across all files."""
+    print("Issues by rule:")
+    for rule in RULES:
+        if rule in issue_totals:
+            print(
+                f"  {rule:<22} {issue_totals[rule]:>8} issues in {files_with_issues[rule]:>3} files"
+                f"  ({RULE_DESCRIPTIONS[rule]})"
+            )
 
-def main():
-    """Main function to validate Participant_ID prefixes in clinical data."""
+def run_validation(
+    clinical_folder, chunksize=None, max_memory_mb=None, max_report_lines=MAX_REPORT_LINES,
+    report_path=None, summary=False
+):
+    """
+    Validate the curated package in clinical_folder against every rule without prompting.
+
+    See main for the options. Returns EXIT_OK, EXIT_FAILED when a file has issues or
+    could not be validated, or EXIT_USAGE when the folder or 'subjects.csv' is unusable.
+    """
     print("Starting Clinical Data Validation Script...\n")
     
-    # Step 1: Get Clinical folder path
-    clinical_folder = get_clinical_folder()
+    # Step 1: Check the Clinical folder
+    report = clinical_Run_Report.RunReport('validation')
     if not os.path.isdir(clinical_folder):
         print(f"Error: The folder '{clinical_folder}' does not exist.")
-        return
+        report.finish(report_path, summary)
+        return EXIT_USAGE
     
-    # Step 2: Define curated filenames
-    curated_filenames = define_curated_filenames()
+    # Step 2: Define curated filenames and their headers
+    with report.stage('define_curated_filenames'):
+        curated_filenames = define_curated_filenames()
+        headers = define_headers()
     
     # Step 3: Create full file paths
     curated_filepaths = create_full_filepaths(clinical_folder, curated_filenames)
     
     # Step 4: Load subjects.csv to get SubjectUID to Group mapping
     subjects_filepath = os.path.join(clinical_folder, 'subjects.csv')
-    uid_to_group = load_subjects(subjects_filepath)
+    with report.stage('load_subjects'):
+        uid_to_group = load_subjects(subjects_filepath)
     if not uid_to_group:
         print("Error: Unable to proceed without SubjectUID to Group mapping.")
-        return
+        report.stages[-1]['errors'] += 1
+        report.finish(report_path, summary)
+        return EXIT_USAGE
     
     # Initialize counters
     total_files = len(curated_filepaths)
-    participant_id_pass = 0
-    participant_id_fail = 0
+    files_passed = 0
+    files_failed = 0
+    issue_totals = {rule: 0 for rule in RULES}
+    files_with_issues = {rule: 0 for rule in RULES}
     
-    # Step 5: Validate each curated file
-    for file_path in curated_filepaths:
-        filename = os.path.basename(file_path)
-        print(f"\nValidating file: {filename}")
-        
-        # Skip subjects.csv itself
-        if filename.lower() == 'subjects.csv':
-            print("Skipping validation for 'subjects.csv'.")
-            continue
-        
-        pid_valid = validate_participant_ids(file_path, uid_to_group)
-        if pid_valid:
-            participant_id_pass += 1
-        else:
-            participant_id_fail += 1
+    # Step 5: Validate each curated file, subjects.csv included
+    with report.stage('validate_files') as stage:
+        for file_path, desired_headers in zip(curated_filepaths, headers):
+            print(f"\nValidating file: {os.path.basename(file_path)}")
+            
+            metrics = clinical_Run_Report.FileMetrics()
+            file_chunksize = chunksize
+            if file_chunksize is None and max_memory_mb is not None and os.path.exists(file_path):
+                file_chunksize = clinical_Schema.estimate_chunksize(
+                    file_path, max_memory_mb, encoding=clinical_Schema.CURATED_ENCODING
+                )
+            validator = validate_file(
+                file_path, uid_to_group, desired_headers, chunksize=file_chunksize,
+                max_report_lines=max_report_lines, metrics=metrics
+            )
+            result = clinical_Run_Report.file_result(file_path, metrics)
+            if validator is not None and validator.passed:
+                files_passed += 1
+            else:
+                files_failed += 1
+                result['status'] = 'invalid' if os.path.exists(file_path) else 'missing'
+            if validator is not None:
+                result['issues'] = validator.issue_counts
+                result['skipped_rules'] = validator.skipped_rules
+                for rule, count in validator.issue_counts.items():
+                    issue_totals[rule] += count
+                    files_with_issues[rule] += int(count > 0)
+            stage['files'].append(result)
     
     # Step 6: Summarize results
     print("\n=== Validation Summary ===")
-    print(f"Total Files Validated: {total_files - 1}")  # Excluding subjects.csv
-    print(f"Participant_ID Validation Passed: {participant_id_pass}")
-    print(f"Participant_ID Validation Failed: {participant_id_fail}")
+    print(f"Total Files Validated: {total_files}")
+    print(f"Validation Passed: {files_passed}")
+    print(f"Validation Failed: {files_failed}")
+    print_validation_summary(issue_totals, files_with_issues)
     print("==========================\n")
     
-    if participant_id_fail == 0:
-        print("All Participant_ID prefixes are correct!")
+    if files_failed == 0:
+        print("All curated files passed validation!")
     else:
-        print("Some Participant_ID prefixes are incorrect. Please review the issues above.")
+        print("Some curated files failed validation. Please review the issues above.")
+    
+    report.finish(report_path, summary)
+    return EXIT_OK if files_failed == 0 else EXIT_FAILED
+
+def main(
+    chunksize=None, max_memory_mb=None, max_report_lines=MAX_REPORT_LINES, report_path=None, summary=False,
+    clinical_folder=None
+):
+    """
+    Main function to validate the curated clinical data against every validation rule.
+
+    The 'Clinical' folder is asked for at the prompt unless clinical_folder is given.
+    chunksize / max_memory_mb stream each file in bounded chunks instead of loading it whole.
+    max_report_lines caps the issue lines printed per rule and file (None prints all of them).
+    report_path writes the run report (see clinical_Run_Report) and summary prints it as a table.
+
+    Returns the exit code from run_validation.
+    """
+    if clinical_folder is None:
+        clinical_folder = get_clinical_folder()
+    return run_validation(
+        clinical_folder, chunksize=chunksize, max_memory_mb=max_memory_mb,
+        max_report_lines=max_report_lines, report_path=report_path, summary=summary
+    )
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Validate the curated 'Clinical' package: headers, leftover sentinels, SubjectUIDs, Participant_ID prefixes, duplicate visits and Visit_Dates.")
+    parser.add_argument(
+        "--input-dir", default=None,
+        help="The curated 'Clinical' folder; asked for at the prompt if not given."
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Stream each file in chunks of this many rows instead of loading it whole."
+    )
+    parser.add_argument(
+        "--max-memory-mb", type=float, default=None,
+        help="Stream each file in chunks sized to stay under this much memory."
+    )
+    parser.add_argument(
+        "--max-report-lines", type=int, default=MAX_REPORT_LINES,
+        help=f"Maximum number of issue lines printed per rule and file; 0 prints all of them (default: {MAX_REPORT_LINES})."
+    )
+    parser.add_argument(
+        "--report", default=None,
+        help="Write a run report with per-step and per-file metrics to this path (JSON, or JSON Lines appended to a '.jsonl' path)."
+    )
+    parser.add_argument(
+        "--summary", action="store_true",
+        help="Print the run report as a table at the end."
+    )
+    args = parser.parse_args()
+    if args.max_report_lines < 0:
+        parser.error("--max-report-lines cannot be negative")
+    if args.chunksize is not None and args.chunksize < 1:
+        parser.error("--chunksize must be at least 1")
+    if args.max_memory_mb is not None and args.max_memory_mb <= 0:
+        parser.error("--max-memory-mb must be positive")
+    sys.exit(main(
+        chunksize=args.chunksize, max_memory_mb=args.max_memory_mb,
+        max_report_lines=args.max_report_lines or None,
+        report_path=args.report, summary=args.summary, clinical_folder=args.input_dir
+    ))